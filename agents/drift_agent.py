@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+from utils.aws_helpers import describe_instance
+from utils.history import HistoryStore
+from utils.events import EventDebouncer, JSONLEventFile, drain_queue, is_kms_alias, resources_from_event
+from utils.kms_index import kms_key_index
+from utils.resource_state import (
+    s3_bucket_state,
+    kms_key_state,
+    ec2_instance_state,
+    is_compliant,
+)
+from utils.rules import rotation_skip_reason
+from utils.logger import get_logger
+
+logger = get_logger("DriftAgent")
+
+
+class DriftAgent:
+    """
+    Continuous compliance agent (READ-ONLY, no auto-remediation):
+    - Consumes resource-change events from a local queue and/or a JSONL file
+    - Maps each event to the affected bucket / key / instance
+    - Debounces + batches events per resource
+    - Re-checks only those resources and records drift when their compliance
+      verdict changes from the last known state. A resource seen for the
+      first time is compared with its last audit in the history store; with
+      no audit on record, finding it non-compliant counts as drift.
+    """
+
+    def __init__(self, debounce_seconds: float = 2.0, max_wait_seconds: float = 10.0,
+                 poll_interval: float = 0.5, events_file: str = None, max_drift_records: int = 1000,
+                 history: HistoryStore = None):
+        self.debouncer = EventDebouncer(debounce_seconds, max_wait_seconds)
+        self.poll_interval = poll_interval
+        self.events = queue.Queue()
+        self.events_file = JSONLEventFile(events_file) if events_file else None
+        self.max_drift_records = max_drift_records
+        self.history = history or HistoryStore()
+
+        self.known_state = {}   # (service, resource_id) -> last state dict
+        self.drift = []         # most recent drift records (newest last)
+        self.stats = {"events": 0, "unmapped_events": 0, "rechecks": 0, "drift_detected": 0}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -----------------------------------------------------
+    # Event intake
+    # -----------------------------------------------------
+    def submit(self, event: dict):
+        """Queue an event for processing (thread-safe)."""
+        self.events.put(event)
+
+    def _ingest(self, events: list):
+        for event in events:
+            self.stats["events"] += 1
+            resources = resources_from_event(event)
+            if not resources:
+                self.stats["unmapped_events"] += 1
+                continue
+            for service, resource_id in resources:
+                if service == "kms" and is_kms_alias(resource_id):
+                    resource_id = self._resolve_alias(resource_id)
+                    if resource_id is None:
+                        continue
+                self.debouncer.add(service, resource_id)
+
+    def _resolve_alias(self, alias: str):
+        """Map a KMS alias to its key id so drift is tracked per key."""
+        meta = kms_key_index.describe(alias)
+        if meta is None:
+            logger.warning(f"Dropping event for unresolvable KMS alias {alias}")
+            return None
+        return meta["KeyId"]
+
+    # -----------------------------------------------------
+    # Re-checks
+    # -----------------------------------------------------
+    def _recheck(self, service: str, resource_id: str):
+        if service == "s3":
+            return s3_bucket_state(resource_id)
+        if service == "kms":
+            # Same scope as the audit: AWS-managed, disabled, asymmetric... keys have no rotation state
+            meta = kms_key_index.describe(resource_id)
+            if meta is None or rotation_skip_reason(meta):
+                return None
+            return kms_key_state(resource_id)
+        if service == "ec2":
+            inst = describe_instance(resource_id)
+            if inst is None or inst["State"] != "running":
+                return None
+            return ec2_instance_state(inst["InstanceId"], inst["Name"])
+        return None
+
+    def _baseline(self, service: str, resource_id: str):
+        """Compliance verdict from the last audit (None if never audited)."""
+        checks = self.history.resource_checks(service, resource_id)
+        return not any(checks.values()) if checks else None
+
+    def process_batch(self, batch: dict) -> list:
+        """Re-check every resource in `batch` ({service: [ids]}) and return new drift records."""
+        found = []
+        for service, resource_ids in batch.items():
+            logger.info(f"🔁 Re-checking {len(resource_ids)} {service.upper()} resource(s)")
+            for resource_id in resource_ids:
+                current = self._recheck(service, resource_id)
+                self.stats["rechecks"] += 1
+
+                key = (service, resource_id)
+                previous = self.known_state.get(key)
+                if current is None:
+                    self.known_state.pop(key, None)
+                else:
+                    self.known_state[key] = current
+
+                # Compare verdicts, not raw state: cpu_48h_avg moves on every re-check
+                compliant = is_compliant(service, current) if current is not None else None
+                if previous is not None:
+                    was_compliant = is_compliant(service, previous)
+                else:
+                    was_compliant = self._baseline(service, resource_id)
+                    # Never audited: only a non-compliant first sighting is news
+                    if was_compliant is None and compliant is not False:
+                        continue
+                if compliant == was_compliant:
+                    continue
+
+                record = {
+                    "service": service.upper(),
+                    "resource_id": resource_id,
+                    "previous": previous,
+                    "was_compliant": was_compliant,
+                    "current": current,
+                    "compliant": compliant,
+                    "detected_at": datetime.utcnow().isoformat()
+                }
+                if record["compliant"] is False:
+                    logger.warning(f"⚠️  Drift: {service.upper()} {resource_id} is non-compliant: {current}")
+                else:
+                    logger.info(f"ℹ️  State change: {service.upper()} {resource_id}: {current}")
+                found.append(record)
+
+        if found:
+            with self._lock:
+                self.stats["drift_detected"] += len(found)
+                self.drift.extend(found)
+                del self.drift[:-self.max_drift_records]
+        return found
+
+    def poll_once(self) -> list:
+        """Pull new events, then re-check whatever the debouncer has released."""
+        events = drain_queue(self.events, timeout=self.poll_interval)
+        if self.events_file:
+            events.extend(self.events_file.read_new())
+        self._ingest(events)
+
+        batch = self.debouncer.ready()
+        return self.process_batch(batch) if batch else []
+
+    # -----------------------------------------------------
+    # Background loop
+    # -----------------------------------------------------
+    def run(self):
+        logger.info("🚀 Drift Agent watching for resource-change events...")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Drift Agent poll failed: {e}")
+                time.sleep(self.poll_interval)
+        logger.info("🛑 Drift Agent stopped.")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="drift-agent", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def report(self, limit: int = 100) -> dict:
+        with self._lock:
+            recent = self.drift[-limit:] if limit else []
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "pending_resources": len(self.debouncer),
+            "stats": dict(self.stats),
+            "drift": recent
+        }
@@ -1,9 +1,13 @@
 from utils.aws_helpers import (
     get_all_instances,
+    iter_instance_pages,
     get_average_cpu_utilization,
     terminate_instance,
 )
+from utils.checkpoint import ScanCheckpoint, run_checkpointed
 from utils.logger import get_logger
+from utils.rules import evaluate_instance
+from utils.single_flight import resource_locks
 
 logger = get_logger("EC2Agent")
 
@@ -18,10 +22,47 @@ class EC2Agent:
 
     def __init__(self, threshold: float = 5.0):
         self.threshold = threshold
+        self.replayed = False   # scan_id's checkpoint was already complete
 
-    def run(self):
+    def audit_instance(self, inst: dict) -> dict:
+        """Check (and act on) a single instance. Concurrent runs on the same instance are serialized."""
+        instance_id = inst["InstanceId"]
+        name = inst["Name"]
+
+        with resource_locks.hold("ec2", instance_id):
+            avg_cpu = get_average_cpu_utilization(instance_id, hours=48)
+            result = evaluate_instance(inst, avg_cpu, self.threshold)
+
+            if result["Action"] != "Active":
+                logger.info(f"🧊 Instance {name} ({instance_id}) idle (CPU {avg_cpu:.2f}%) — terminating.")
+                terminate_instance(instance_id)
+            else:
+                logger.info(f"🔥 Instance {name} ({instance_id}) active (CPU {avg_cpu:.2f}%) — skipping.")
+
+        return result
+
+    def run(self, scan_id: str = None):
+        """
+        Audit every running instance. With a `scan_id`, progress is checkpointed
+        to disk and a later run with the same ID resumes where this one stopped.
+        """
         results = []
         logger.info("🚀 EC2 Agent started scanning...")
+
+        if scan_id:
+            checkpoint = ScanCheckpoint("ec2", scan_id)
+            self.replayed = checkpoint.completed
+            results = run_checkpointed(
+                checkpoint,
+                pages=iter_instance_pages,
+                key_fn=lambda inst: inst["InstanceId"],
+                audit_fn=self.audit_instance,
+            )
+            if not results:
+                logger.info("No running EC2 instances found.")
+                return {"ec2": "No running instances found."}
+            return {"ec2": results}
+
         instances = get_all_instances()
 
         if not instances:
@@ -29,26 +70,6 @@ class EC2Agent:
             return {"ec2": "No running instances found."}
 
         for inst in instances:
-            instance_id = inst["InstanceId"]
-            name = inst["Name"]
-            avg_cpu = get_average_cpu_utilization(instance_id, hours=48)
-
-            if avg_cpu < self.threshold:
-                logger.info(f"🧊 Instance {name} ({instance_id}) idle (CPU {avg_cpu:.2f}%) — terminating.")
-                terminate_instance(instance_id)
-                results.append({
-                    "InstanceId": instance_id,
-                    "Name": name,
-                    "AvgCPU": avg_cpu,
-                    "Action": "Terminated (or DRY_RUN)"
-                })
-            else:
-                logger.info(f"🔥 Instance {name} ({instance_id}) active (CPU {avg_cpu:.2f}%) — skipping.")
-                results.append({
-                    "InstanceId": instance_id,
-                    "Name": name,
-                    "AvgCPU": avg_cpu,
-                    "Action": "Active"
-                })
+            results.append(self.audit_instance(inst))
 
         return {"ec2": results}
@@ -3,7 +3,10 @@ from utils.aws_helpers import (
     check_key_rotation,
     enable_key_rotation,
 )
+from utils.kms_index import kms_key_index
 from utils.logger import log_action
+from utils.rules import evaluate_key
+from utils.single_flight import resource_locks
 
 
 class KMSAgent:
@@ -11,30 +14,34 @@ class KMSAgent:
     The KMS agent checks every customer-managed key to ensure:
       1️⃣ Key rotation is enabled.
     If disabled, it automatically enables it.
+
+    AWS-managed, disabled / pending-deletion, asymmetric and imported keys
+    are skipped via the cached key metadata index (no rotation calls).
     """
 
     def __init__(self):
         self.findings = []
+        self.skipped = []
 
-    def run(self):
-        keys = get_kms_keys()   # returns: ["key-id-1", "key-id-2"]
-
-        for key_id in keys:
-            key_result = {
-                "key_id": key_id,
-                "rotation_enabled": None,
-                "actions": []
-            }
-
-            rotation_status = check_key_rotation(key_id)
-            key_result["rotation_enabled"] = rotation_status
+    def audit_key(self, key_id: str) -> dict:
+        """Check (and fix) a single key. Concurrent runs on the same key are serialized."""
+        with resource_locks.hold("kms", key_id):
+            key_result = evaluate_key(key_id, rotation_enabled=check_key_rotation(key_id))
 
-            if not rotation_status:
+            if key_result["actions"]:
                 log_action(f"🔄 Enabling key rotation for key {key_id}")
                 enable_key_rotation(key_id)
-                key_result["actions"].append("Enabled key rotation")
 
-            self.findings.append(key_result)
+        return key_result
+
+    def run(self):
+        keys = get_kms_keys()   # returns: ["key-id-1", "key-id-2"]
+        keys, self.skipped = kms_key_index.partition(keys)
+
+        for key_id in keys:
+            self.findings.append(self.audit_key(key_id))
 
+        if self.skipped:
+            log_action(f"⏭️  Skipped {len(self.skipped)} out-of-scope key(s) — rotation calls saved")
         log_action("✅ Completed KMS audit.")
         return self.findings
@@ -9,25 +9,33 @@ from pathlib import Path
 env_path = Path(__file__).parent / "config" / "settings.env"
 load_dotenv(dotenv_path=env_path)
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from utils.llm_gateway import get_llm_gateway
 from utils.logger import get_logger
 from utils.memory import AgentMemory
 from agents.ec2_agent import EC2Agent
 from agents.s3_agent import S3Agent
 from agents.kms_agent import KMSAgent
 from dotenv import load_dotenv
-import json, os
+import json
 
 load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
+
+
+def _is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
 
 
 class MasterAgent:
 
     def __init__(self, use_ai=True):
         self.use_ai = use_ai
-        self.llm = ChatOpenAI(model="gpt-4o-mini", api_key=openai_api_key)
+        # Shared, pooled + cached client (not one per MasterAgent)
+        self.llm = get_llm_gateway()
         self.logger = get_logger("MasterAgent")
 
         self.agent_memory = AgentMemory()
@@ -73,7 +81,8 @@ class MasterAgent:
         }}
         """
 
-        response = self.llm.invoke(decision_prompt)
+        # Only valid JSON is cached, so a bad routing answer is not replayed
+        response = self.llm.invoke(decision_prompt, cache_if=_is_json)
         text = response.content.strip()
 
         # 1️⃣ First attempt to parse JSON
@@ -90,7 +99,7 @@ class MasterAgent:
         Input:
         {text}
         """
-        fixed = self.llm.invoke(fix_prompt).content.strip()
+        fixed = self.llm.invoke(fix_prompt, cache_if=_is_json).content.strip()
 
         try:
             return json.loads(fixed)
@@ -142,11 +151,12 @@ class MasterAgent:
         {results}
         """)
         formatted = summary_prompt.format(results=results)
+        # Identical audit results → cached summary, no new LLM call
         summary = self.llm.invoke(formatted).content
 
         # Save to conversation memory & persistent memory
         self.agent_memory.save_message("assistant", summary)
-        self.agent_memory.save_run("MasterAgent", summary)
+        self.agent_memory.save_run("MasterAgent", summary, results=results)
 
         return summary
 
@@ -159,7 +169,7 @@ class MasterAgent:
         history = self.agent_memory.get_history_as_text()
         prompt = f"{history}\nUser: {message}\nAssistant: "
 
-        response = self.llm.invoke(prompt).content
+        response = self.llm.invoke(prompt, cache=False).content
         self.agent_memory.save_message("assistant", response)
 
         return response
@@ -1,5 +1,6 @@
 from utils.aws_helpers import (
     get_s3_buckets,
+    iter_bucket_pages,
     check_s3_versioning,
     check_s3_encryption,
     enable_versioning,
@@ -7,7 +8,10 @@ from utils.aws_helpers import (
     is_public_access_enabled,
     block_public_access
 )
+from utils.checkpoint import ScanCheckpoint, run_checkpointed
 from utils.logger import log_action
+from utils.rules import evaluate_bucket
+from utils.single_flight import resource_locks
 
 
 class S3Agent:
@@ -25,45 +29,56 @@ class S3Agent:
 
     def __init__(self):
         self.findings = []
+        self.replayed = False   # scan_id's checkpoint was already complete
 
-    def run(self):
-        buckets = get_s3_buckets()
-
-        for bucket_name in buckets:
-            bucket_result = {
-                "bucket": bucket_name,
-                "checks": {},
-                "actions": []
-            }
+    def audit_bucket(self, bucket_name: str) -> dict:
+        """Check (and fix) a single bucket. Concurrent runs on the same bucket are serialized."""
+        with resource_locks.hold("s3", bucket_name):
+            # Same rules as offline dump audits (utils.rules)
+            bucket_result = evaluate_bucket(
+                bucket_name,
+                versioning=check_s3_versioning(bucket_name),        # 1️⃣ VERSIONING
+                encryption=check_s3_encryption(bucket_name),        # 2️⃣ ENCRYPTION
+                public_access=is_public_access_enabled(bucket_name)  # 3️⃣ PUBLIC ACCESS
+            )
 
-            # 1️⃣ VERSIONING
-            versioning = check_s3_versioning(bucket_name)
-            bucket_result["checks"]["versioning"] = versioning
+            checks = bucket_result["checks"]
 
-            if not versioning:
+            if not checks["versioning"]:
                 log_action(f"⚠️  Versioning disabled for {bucket_name} — enabling...")
                 enable_versioning(bucket_name)
-                bucket_result["actions"].append("Enabled versioning")
 
-            # 2️⃣ ENCRYPTION
-            encryption = check_s3_encryption(bucket_name)
-            bucket_result["checks"]["encryption"] = encryption
-
-            if not encryption:
+            if not checks["encryption"]:
                 log_action(f"⚠️  Encryption disabled for {bucket_name} — enabling AES256...")
                 enable_encryption(bucket_name)
-                bucket_result["actions"].append("Enabled AES256 encryption")
-
-            # 3️⃣ PUBLIC ACCESS
-            public_status = is_public_access_enabled(bucket_name)
-            bucket_result["checks"]["public_access"] = public_status
 
-            if public_status:
+            if checks["public_access"]:
                 log_action(f"🛑 Public access ENABLED for {bucket_name} — blocking...")
                 block_public_access(bucket_name)
-                bucket_result["actions"].append("Blocked public access")
 
-            self.findings.append(bucket_result)
+        return bucket_result
+
+    def run(self, scan_id: str = None):
+        """
+        Audit every bucket. With a `scan_id`, progress is checkpointed to disk
+        and a later run with the same ID resumes where this one stopped.
+        """
+        if scan_id:
+            checkpoint = ScanCheckpoint("s3", scan_id)
+            self.replayed = checkpoint.completed
+            self.findings = run_checkpointed(
+                checkpoint,
+                pages=iter_bucket_pages,
+                key_fn=lambda bucket_name: bucket_name,
+                audit_fn=self.audit_bucket,
+            )
+            log_action(f"✅ Completed S3 audit (scan {scan_id}).")
+            return self.findings
+
+        buckets = get_s3_buckets()
+
+        for bucket_name in buckets:
+            self.findings.append(self.audit_bucket(bucket_name))
 
         log_action("✅ Completed S3 audit.")
         return self.findings
@@ -0,0 +1,40 @@
+"""
+Synthetic sharding benchmark — no AWS access needed.
+
+    python -m benchmarks.bench_sharding --items 2000 --workers 1 2 4 8
+    python -m benchmarks.bench_sharding --mode synthetic_cpu
+
+`synthetic` sleeps ~one API round trip per resource (the real audit is
+I/O bound); `synthetic_cpu` burns CPU per resource instead.
+"""
+import argparse
+import time
+
+from utils.sharding import run_sharded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=["synthetic", "synthetic_cpu"], default="synthetic")
+    args = parser.parse_args()
+
+    items = [f"resource-{i}" for i in range(args.items)]
+    baseline = None
+
+    print(f"{'workers':>8} {'seconds':>9} {'items/s':>10} {'speedup':>8} {'efficiency':>10}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = run_sharded(args.mode, items, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert [r["id"] for r in results] == items
+
+        throughput = len(items) / elapsed
+        baseline = baseline or throughput / workers
+        speedup = throughput / baseline
+        print(f"{workers:>8} {elapsed:>9.2f} {throughput:>10.1f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
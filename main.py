@@ -4,6 +4,11 @@ Runs:
 - Individual agent audit endpoints (EC2, S3, KMS)
 - Master AI or LangGraph orchestration
 - New READ-ONLY state endpoints
+- Continuous compliance (event-driven drift re-checks)
+- Single-flight coalescing of identical concurrent requests
+- Cursor-paginated, field-selectable /state responses (JSON or NDJSON)
+- Compliance history trends + per-resource drift (/history)
+- Sharded audits across worker processes (?workers=N)
 """
 
 from dotenv import load_dotenv
@@ -13,7 +18,12 @@ from pathlib import Path
 env_path = Path(__file__).parent / "config" / "settings.env"
 load_dotenv(dotenv_path=env_path)
 
-from fastapi import FastAPI, Query
+import json
+import os
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Query, Body, HTTPException
+from fastapi.responses import StreamingResponse
 import uvicorn
 from pydantic import BaseModel
 
@@ -21,18 +31,28 @@ from agents.master_agent import MasterAgent
 from agents.ec2_agent import EC2Agent
 from agents.s3_agent import S3Agent
 from agents.kms_agent import KMSAgent
+from agents.drift_agent import DriftAgent
 
 # Read-only helpers (NO auto-remediation)
 from utils.aws_helpers import (
     get_all_instances,
-    get_average_cpu_utilization,
     get_s3_buckets,
-    check_s3_versioning,
-    check_s3_encryption,
-    is_public_access_enabled,
     get_kms_keys,
-    check_key_rotation
 )
+from utils.resource_state import (
+    s3_bucket_state,
+    kms_key_state,
+    ec2_instance_state,
+    S3_FIELDS,
+    KMS_FIELDS,
+    EC2_FIELDS,
+)
+from utils.pagination import paginate, parse_fields, decode_cursor
+from utils.history import HistoryStore
+from utils.kms_index import kms_key_index
+from utils.llm_gateway import get_llm_gateway
+from utils.sharding import audit_sharded
+from utils.single_flight import single_flight, request_key, coalescing_stats
 
 app = FastAPI(title="AWS Multi-Agent System", version="2.0")
 
@@ -45,80 +65,274 @@ def run_master_audit(
     prompt: str = Query("Audit my AWS resources"),
     use_ai: bool = Query(True)
 ):
-    master = MasterAgent(use_ai=use_ai)
-    result = master.run(prompt)
+    def _run():
+        master = MasterAgent(use_ai=use_ai)
+        return master.run(prompt)
+
+    # Identical concurrent prompts share one audit + summary
+    result = single_flight.do(request_key("/chat", prompt=prompt, use_ai=use_ai), _run)
     return {"status": "success", "summary": result}
 
 
 # --------------------------------------------------------
 #  INDIVIDUAL AGENT AUDIT (with fixes)
 # --------------------------------------------------------
+_SCAN_ID = Query(None, description="Checkpoint + resume under this ID")
+_WORKERS = Query(None, ge=1, le=64, description="Shard the audit across this many workers")
+
+
+def _sharded_audit(service: str, workers: int, scan_id: str):
+    if scan_id:
+        raise HTTPException(status_code=400, detail="scan_id and workers cannot be combined")
+    return audit_sharded(service, workers=workers)
+
+
+def _agent_audit(endpoint: str, agent_cls, service: str, scan_id: str):
+    def _run():
+        agent = agent_cls()
+        result = agent.run(scan_id=scan_id)
+        # A finished scan_id only replays its checkpoint; it was recorded when it ran
+        if not agent.replayed:
+            HistoryStore().record_run({service: result})
+        return result
+
+    try:
+        if not scan_id:
+            return _run()
+        # Concurrent requests for one scan_id share a run instead of both
+        # remediating and appending to the same checkpoint log
+        return single_flight.do(request_key(endpoint, scan_id=scan_id), _run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/ec2")
-def run_ec2_audit():
-    return {"service": "EC2", "result": EC2Agent().run()}
+def run_ec2_audit(scan_id: str = _SCAN_ID, workers: int = _WORKERS):
+    if workers:
+        result = _sharded_audit("ec2", workers, scan_id)["result"]
+        HistoryStore().record_run({"EC2": result})
+    else:
+        result = _agent_audit("/ec2", EC2Agent, "EC2", scan_id)
+    return {"service": "EC2", "result": result}
 
 
 @app.get("/s3")
-def run_s3_audit():
-    return {"service": "S3", "result": S3Agent().run()}
+def run_s3_audit(scan_id: str = _SCAN_ID, workers: int = _WORKERS):
+    if workers:
+        result = _sharded_audit("s3", workers, scan_id)["result"]
+        HistoryStore().record_run({"S3": result})
+    else:
+        result = _agent_audit("/s3", S3Agent, "S3", scan_id)
+    return {"service": "S3", "result": result}
 
 
 @app.get("/kms")
-def run_kms_audit():
-    return {"service": "KMS", "result": KMSAgent().run()}
+def run_kms_audit(workers: int = _WORKERS):
+    if workers:
+        sharded = _sharded_audit("kms", workers, None)
+        result, skipped = sharded["result"], sharded["skipped"]
+    else:
+        agent = KMSAgent()
+        result, skipped = agent.run(), agent.skipped
+    HistoryStore().record_run({"KMS": result})
+    return {
+        "service": "KMS",
+        "result": result,
+        "skipped": skipped,
+        "key_index": kms_key_index.report()
+    }
 
 
 # --------------------------------------------------------
 #  READ-ONLY STATE ENDPOINTS (NO FIXES)
 # --------------------------------------------------------
 
-@app.get("/ec2/state")
-def ec2_state():
-    """Read-only: show current EC2 CPU avg + instance list."""
-    instances = get_all_instances()
-    state = []
+def _state_response(service: str, endpoint: str, list_fn, key_fn, state_fn,
+                    limit, cursor, fields, allowed_fields, fmt):
+    """
+    Shared pagination / field selection / NDJSON streaming for the /state endpoints.
+    Only the resources on the requested page are checked, and only for `fields`.
+    `list_fn()` returns (inventory, extra response fields); it runs inside the
+    single-flight call so identical concurrent requests share one listing.
+    """
+    try:
+        selected = parse_fields(fields, allowed_fields)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    params = {"limit": limit, "cursor": cursor, "fields": ",".join(selected)}
+
+    def _list_page():
+        items, extra = list_fn()
+        page, next_cursor = paginate(items, cursor=cursor, limit=limit, key_fn=key_fn)
+        return page, next_cursor, extra
+
+    if fmt == "ndjson":
+        # Listing is coalesced; the per-resource checks stream as the client reads
+        page, next_cursor, _ = single_flight.do(
+            request_key(endpoint, stage="listing", **params), _list_page
+        )
+        lines = (json.dumps(state_fn(item, selected)) + "\n" for item in page)
+        return StreamingResponse(
+            lines,
+            media_type="application/x-ndjson",
+            headers={"X-Next-Cursor": next_cursor or ""}
+        )
+
+    def _compute():
+        page, next_cursor, extra = _list_page()
+        result = {
+            "service": service,
+            "state": [state_fn(item, selected) for item in page],
+            "next_cursor": next_cursor
+        }
+        result.update(extra)
+        return result
+
+    return single_flight.do(request_key(endpoint, **params), _compute)
 
-    for inst in instances:
-        avg_cpu = get_average_cpu_utilization(inst["InstanceId"], hours=48)
-        state.append({
-            "instance_id": inst["InstanceId"],
-            "name": inst["Name"],
-            "cpu_48h_avg": avg_cpu
-        })
 
-    return {"service": "EC2", "state": state}
+@app.get("/ec2/state")
+def ec2_state(
+    limit: int = Query(None, ge=1, le=10000),
+    cursor: str = Query(None),
+    fields: str = Query(None, description="Comma-separated: name,cpu_48h_avg"),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """Read-only: show current EC2 CPU avg + instance list."""
+    return _state_response(
+        "EC2", "/ec2/state",
+        list_fn=lambda: (get_all_instances(), {}),
+        key_fn=lambda inst: inst["InstanceId"],
+        state_fn=lambda inst, f: ec2_instance_state(inst["InstanceId"], inst["Name"], fields=f),
+        limit=limit, cursor=cursor, fields=fields, allowed_fields=EC2_FIELDS, fmt=format
+    )
 
 
 @app.get("/s3/state")
-def s3_state():
+def s3_state(
+    limit: int = Query(None, ge=1, le=10000),
+    cursor: str = Query(None),
+    fields: str = Query(None, description="Comma-separated: versioning,encryption,public_access"),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
     """Read-only: show versioning + encryption + public access."""
-    buckets = get_s3_buckets()
-    state = []
-
-    for b in buckets:
-        state.append({
-            "bucket": b,
-            "versioning": check_s3_versioning(b),
-            "encryption": check_s3_encryption(b),
-            "public_access": is_public_access_enabled(b)
-        })
-
-    return {"service": "S3", "state": state}
+    return _state_response(
+        "S3", "/s3/state",
+        list_fn=lambda: (get_s3_buckets(), {}),
+        key_fn=lambda b: b,
+        state_fn=lambda b, f: s3_bucket_state(b, fields=f),
+        limit=limit, cursor=cursor, fields=fields, allowed_fields=list(S3_FIELDS), fmt=format
+    )
 
 
 @app.get("/kms/state")
-def kms_state():
+def kms_state(
+    limit: int = Query(None, ge=1, le=10000),
+    cursor: str = Query(None),
+    fields: str = Query(None, description="Comma-separated: rotation_enabled"),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
     """Read-only: show KMS rotation statuses."""
-    keys = get_kms_keys()
-    state = []
+    def _list_keys():
+        keys, skipped = kms_key_index.partition(get_kms_keys())
+
+        # Skipped keys are reported once, on the first page
+        extra = {"rotation_calls_saved": len(skipped)}
+        if not cursor:
+            extra["skipped"] = skipped
+        return keys, extra
+
+    return _state_response(
+        "KMS", "/kms/state",
+        list_fn=_list_keys,
+        key_fn=lambda k: k,
+        state_fn=lambda k, f: kms_key_state(k, fields=f),
+        limit=limit, cursor=cursor, fields=fields, allowed_fields=list(KMS_FIELDS), fmt=format
+    )
 
-    for key_id in keys:
-        state.append({
-            "key_id": key_id,
-            "rotation_enabled": check_key_rotation(key_id)
-        })
 
-    return {"service": "KMS", "state": state}
+@app.get("/coalescing/stats")
+def coalescing_report():
+    """How many requests ran vs. were coalesced onto an in-flight call."""
+    return coalescing_stats()
+
+
+# --------------------------------------------------------
+#  COMPLIANCE HISTORY (READ-ONLY)
+# --------------------------------------------------------
+def _parse_time(value: str):
+    """ISO date/datetime → epoch seconds (naive values are UTC)."""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+@app.get("/history")
+def compliance_history(
+    service: str = Query(..., pattern="^(ec2|s3|kms|EC2|S3|KMS)$"),
+    check: str = Query(None, description="e.g. public_access, versioning_disabled, rotation_disabled, idle"),
+    granularity: str = Query("day", pattern="^(scan|day|week)$"),
+    since: str = Query(None, description="ISO date/datetime (UTC)"),
+    until: str = Query(None, description="ISO date/datetime (UTC)"),
+    resource_id: str = Query(None, description="Return this resource's drift instead of a trend")
+):
+    """Failing-count trends per check, or the change log of a single resource."""
+    try:
+        since_ts, until_ts = _parse_time(since), _parse_time(until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    store = HistoryStore()
+    if resource_id:
+        return {
+            "service": service.upper(),
+            "resource_id": resource_id,
+            "drift": store.resource_drift(service, resource_id, since=since_ts, until=until_ts)
+        }
+    return {
+        "service": service.upper(),
+        "granularity": granularity,
+        "trend": store.trend(service, check, granularity=granularity, since=since_ts, until=until_ts)
+    }
+
+
+# --------------------------------------------------------
+#  CONTINUOUS COMPLIANCE (EVENT-DRIVEN, READ-ONLY)
+# --------------------------------------------------------
+drift_agent = DriftAgent(
+    debounce_seconds=float(os.getenv("DRIFT_DEBOUNCE_SECONDS", "2")),
+    max_wait_seconds=float(os.getenv("DRIFT_MAX_WAIT_SECONDS", "10")),
+    events_file=os.getenv("COMPLIANCE_EVENTS_FILE"),
+)
+
+
+@app.on_event("startup")
+def start_drift_agent():
+    drift_agent.start()
+
+
+@app.on_event("shutdown")
+def stop_drift_agent():
+    drift_agent.stop()
+
+
+@app.post("/events")
+def submit_events(event: dict = Body(...)):
+    """Push a CloudTrail/EventBridge event (or {"Records": [...]}) for re-checking."""
+    drift_agent.submit(event)
+    return {"status": "queued"}
+
+
+@app.get("/drift")
+def drift_report(limit: int = Query(100, ge=0)):
+    """Recent drift detected by the event-driven re-checks."""
+    return drift_agent.report(limit=limit)
 
 
 # --------------------------------------------------------
@@ -134,6 +348,12 @@ def router_debug(req: RouterRequest):
     return master.debug_router(req.prompt)
 
 
+@app.get("/llm/stats")
+def llm_stats():
+    """Shared LLM gateway: calls, cache hits, queued calls, timeouts."""
+    return get_llm_gateway().report()
+
+
 # --------------------------------------------------------
 #  MEMORY ENDPOINT
 # --------------------------------------------------------
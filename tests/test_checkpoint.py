@@ -0,0 +1,72 @@
+import pytest
+
+import utils.checkpoint as checkpoint_module
+from utils.checkpoint import ScanCheckpoint, run_checkpointed
+
+PAGES = [(["a", "b"], "t1"), (["c", "d"], "t2"), (["e"], None)]
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_module, "CHECKPOINT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def pages_from(calls):
+    def pages(next_token):
+        calls.append(next_token)
+        start = 0 if next_token is None else [token for _, token in PAGES].index(next_token) + 1
+        yield from PAGES[start:]
+    return pages
+
+
+def test_resume_after_crash():
+    audited, listed = [], []
+
+    def audit_then_crash(item):
+        if item == "d":
+            raise RuntimeError("boom")
+        audited.append(item)
+        return {"id": item}
+
+    with pytest.raises(RuntimeError):
+        run_checkpointed(ScanCheckpoint("s3", "scan-1"), pages_from(listed), lambda i: i, audit_then_crash)
+    assert audited == ["a", "b", "c"]
+
+    def audit(item):
+        audited.append(item)
+        return {"id": item}
+
+    listed.clear()
+    results = run_checkpointed(ScanCheckpoint("s3", "scan-1"), pages_from(listed), lambda i: i, audit)
+
+    assert results == [{"id": i} for i in "abcde"]
+    assert audited == ["a", "b", "c", "d", "e"]   # nothing re-checked
+    assert listed == ["t2"]                       # listing resumed from the saved marker
+
+
+def test_completed_scan_is_replayed():
+    run_checkpointed(ScanCheckpoint("s3", "scan-2"), pages_from([]), lambda i: i, lambda i: i.upper())
+
+    checkpoint = ScanCheckpoint("s3", "scan-2")
+    assert checkpoint.completed
+    results = run_checkpointed(checkpoint, pages_from([]), lambda i: i, pytest.fail)
+    assert results == list("ABCDE")
+
+
+def test_torn_tail_is_truncated():
+    checkpoint = ScanCheckpoint("ec2", "scan-3")
+    checkpoint.record_page(["a"], None)
+    checkpoint.record_result("a", {"ok": True})
+    with open(checkpoint.path, "a") as f:
+        f.write('{"type": "result", "id": "b", "res')
+
+    resumed = ScanCheckpoint("ec2", "scan-3")
+    assert resumed.results == {"a": {"ok": True}}
+    with open(resumed.path) as f:
+        assert f.read().endswith("\n")
+
+
+def test_scan_id_is_validated():
+    with pytest.raises(ValueError):
+        ScanCheckpoint("s3", "../etc")
@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("boto3")  # agents import the live AWS helpers
+
+from agents.drift_agent import DriftAgent
+from utils.history import HistoryStore
+
+PUBLIC = {"versioning": True, "encryption": True, "public_access": True}
+PRIVATE = {"versioning": True, "encryption": True, "public_access": False}
+
+
+@pytest.fixture
+def history(tmp_path):
+    return HistoryStore(path=str(tmp_path / "history.db"))
+
+
+def make_agent(history, states):
+    agent = DriftAgent(history=history)
+    agent._recheck = lambda service, resource_id: states[(service, resource_id)]
+    return agent
+
+
+def test_first_event_compares_against_last_audit(history):
+    history.record_run({"S3": [{"bucket": "b", "checks": PRIVATE, "actions": []}]})
+    agent = make_agent(history, {("s3", "b"): PUBLIC})
+
+    agent.submit({"eventSource": "s3.amazonaws.com", "eventName": "DeletePublicAccessBlock",
+                  "requestParameters": {"bucketName": "b"}})
+    agent.debouncer.debounce_seconds = 0
+    found = agent.poll_once()
+
+    assert [(r["resource_id"], r["was_compliant"], r["compliant"]) for r in found] == [("b", True, False)]
+    assert agent.stats["drift_detected"] == 1
+
+
+def test_unaudited_first_sighting(history):
+    agent = make_agent(history, {("s3", "bad"): PUBLIC, ("s3", "good"): PRIVATE})
+    found = agent.process_batch({"s3": ["bad", "good"]})
+
+    # Non-compliant with no audit on record is drift; compliant just sets the baseline
+    assert [(r["resource_id"], r["previous"], r["compliant"]) for r in found] == [("bad", None, False)]
+    assert agent.known_state[("s3", "good")] == PRIVATE
+
+
+def test_verdicts_not_raw_state(history):
+    states = {("ec2", "i-1"): {"name": "web", "cpu_48h_avg": 40.0}}
+    agent = make_agent(history, states)
+    assert agent.process_batch({"ec2": ["i-1"]}) == []
+
+    states[("ec2", "i-1")] = {"name": "web", "cpu_48h_avg": 38.5}
+    assert agent.process_batch({"ec2": ["i-1"]}) == []
+
+    states[("ec2", "i-1")] = {"name": "web", "cpu_48h_avg": 1.0}
+    assert [r["compliant"] for r in agent.process_batch({"ec2": ["i-1"]})] == [False]
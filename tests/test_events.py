@@ -0,0 +1,52 @@
+from utils.events import EventDebouncer, is_kms_alias, resources_from_event
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_becomes_one_recheck():
+    clock = FakeClock()
+    debouncer = EventDebouncer(debounce_seconds=2.0, max_wait_seconds=10.0, clock=clock)
+    for _ in range(5):
+        debouncer.add("s3", "bucket")
+        clock.now += 0.5
+    assert debouncer.ready() == {}
+
+    clock.now += 2.0
+    assert debouncer.ready() == {"s3": ["bucket"]}
+    assert len(debouncer) == 0
+
+
+def test_max_wait_releases_busy_resource():
+    clock = FakeClock()
+    debouncer = EventDebouncer(debounce_seconds=2.0, max_wait_seconds=5.0, clock=clock)
+    debouncer.add("kms", "key")
+    debouncer.add("ec2", "i-1")
+    while clock.now < 5.0:
+        clock.now += 1.0
+        debouncer.add("kms", "key")
+    assert debouncer.ready() == {"kms": ["key"], "ec2": ["i-1"]}
+
+
+def test_resources_from_event():
+    cloudtrail = {"Records": [
+        {"eventSource": "s3.amazonaws.com", "requestParameters": {"bucketName": "b"}},
+        {"eventSource": "s3.amazonaws.com", "requestParameters": {"bucketName": "b"}},
+        {"eventSource": "kms.amazonaws.com",
+         "requestParameters": {"keyId": "arn:aws:kms:eu-west-1:1:key/abc"}},
+        {"eventSource": "ec2.amazonaws.com",
+         "requestParameters": {"instancesSet": {"items": [{"instanceId": "i-1"}]}}},
+    ]}
+    assert resources_from_event(cloudtrail) == [("s3", "b"), ("kms", "abc"), ("ec2", "i-1")]
+    assert resources_from_event({"source": "aws.ec2", "detail": {"instance-id": "i-2"}}) == [("ec2", "i-2")]
+
+
+def test_kms_aliases_are_flagged():
+    assert is_kms_alias("alias/app")
+    assert is_kms_alias("arn:aws:kms:eu-west-1:1:alias/app")
+    assert not is_kms_alias("abc")
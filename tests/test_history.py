@@ -0,0 +1,72 @@
+import pytest
+
+from utils.history import DAY, HistoryStore, day_start, extract_findings, week_start
+
+MONDAY = 1704067200   # 2024-01-01 00:00 UTC
+NOON = 12 * 3600
+
+
+def bucket(name, versioning=True, encryption=True, public_access=False):
+    return {"bucket": name, "checks": {"versioning": versioning, "encryption": encryption,
+                                       "public_access": public_access}, "actions": []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(path=str(tmp_path / "history.db"), raw_retention_days=90)
+
+
+def test_day_and_week_start():
+    wednesday = MONDAY + 2 * DAY + NOON
+    assert day_start(wednesday) == MONDAY + 2 * DAY
+    assert week_start(wednesday) == MONDAY
+    assert week_start(MONDAY) == MONDAY
+    assert week_start(MONDAY - 1) == MONDAY - 7 * DAY   # Sunday 23:59:59 belongs to the previous week
+
+
+def test_extract_findings():
+    assert extract_findings("s3", [bucket("b", encryption=False)]) == {
+        "b": {"versioning_disabled": False, "encryption_disabled": True, "public_access": False}
+    }
+    assert extract_findings("EC2", {"ec2": "No running instances found."}) == {}
+    with pytest.raises(ValueError):
+        extract_findings("rds", [])
+
+
+def test_rollups_upsert_per_day_and_week(store):
+    store.record_run({"S3": [bucket("a", versioning=False), bucket("b", versioning=False)]}, ts=MONDAY + NOON)
+    store.record_run({"S3": [bucket("a"), bucket("b", versioning=False)]}, ts=MONDAY + NOON + 3600)
+    store.record_run({"S3": [bucket("a"), bucket("b")]}, ts=MONDAY + DAY + NOON)
+
+    days = store.trend("S3", "versioning_disabled", granularity="day", since=MONDAY, until=MONDAY + 7 * DAY)
+    assert [(d["scans"], d["failing_avg"], d["failing_min"], d["failing_max"], d["failing_last"])
+            for d in days] == [(2, 1.5, 1, 2, 1), (1, 0.0, 0, 0, 0)]
+
+    weeks = store.trend("S3", "versioning_disabled", granularity="week", since=MONDAY, until=MONDAY + 7 * DAY)
+    assert [(w["scans"], w["failing_max"], w["failing_last"], w["total_last"]) for w in weeks] == [(3, 2, 0, 2)]
+
+    scans = store.trend("S3", "versioning_disabled", granularity="scan", since=MONDAY, until=MONDAY + 7 * DAY)
+    assert [s["failing"] for s in scans] == [2, 1, 0]
+
+    with pytest.raises(ValueError):
+        store.trend("S3", granularity="month")
+
+
+def test_transitions_record_changes_only(store):
+    store.record_run({"KMS": [{"key_id": "k", "rotation_enabled": False}]}, ts=MONDAY)
+    store.record_run({"KMS": [{"key_id": "k", "rotation_enabled": False}]}, ts=MONDAY + 3600)
+    store.record_run({"KMS": [{"key_id": "k", "rotation_enabled": True}]}, ts=MONDAY + 7200)
+
+    drift = store.resource_drift("KMS", "k", since=MONDAY, until=MONDAY + DAY)
+    assert [(d["was_failing"], d["is_failing"]) for d in drift] == [(None, True), (True, False)]
+    assert store.resource_checks("kms", "k") == {"rotation_disabled": False}
+    assert store.resource_checks("kms", "unknown") == {}
+
+
+def test_raw_totals_are_pruned_but_rollups_kept(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "history.db"), raw_retention_days=1)
+    store.record_run({"EC2": {"ec2": [{"InstanceId": "i-1", "Action": "Active"}]}}, ts=MONDAY)
+    store.record_run({"EC2": {"ec2": [{"InstanceId": "i-1", "Action": "Active"}]}}, ts=MONDAY + 3 * DAY)
+
+    assert len(store.trend("EC2", granularity="scan", since=0, until=MONDAY + 7 * DAY)) == 1
+    assert len(store.trend("EC2", granularity="day", since=MONDAY, until=MONDAY + 7 * DAY)) == 2
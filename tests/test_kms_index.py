@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("boto3")  # kms_index imports the live AWS helpers
+
+import utils.kms_index as kms_index_module
+from utils.kms_index import KMSKeyIndex
+
+IN_SCOPE = {"KeyManager": "CUSTOMER", "KeyState": "Enabled", "KeySpec": "SYMMETRIC_DEFAULT", "Origin": "AWS_KMS"}
+
+
+@pytest.fixture
+def described(monkeypatch):
+    """key_id -> metadata served by the fake describe_key; records every call."""
+    table, calls = {}, []
+
+    def describe(key_id):
+        calls.append(key_id)
+        meta = table.get(key_id)
+        return dict(meta, KeyId=key_id) if meta else None
+
+    monkeypatch.setattr(kms_index_module, "describe_kms_key", describe)
+    return table, calls
+
+
+def test_partition_and_caching(described):
+    table, calls = described
+    table.update({"mine": IN_SCOPE, "aws": {**IN_SCOPE, "KeyManager": "AWS"}})
+    index = KMSKeyIndex()
+
+    assert index.partition(["mine", "aws"]) == (["mine"], [{"key_id": "aws", "reason": "aws_managed"}])
+    index.partition(["mine", "aws"])
+
+    assert sorted(calls) == ["aws", "mine"]   # described once, then cached
+    assert index.report()["rotation_calls_saved"] == 2
+
+
+def test_failed_describe_is_retried(described):
+    table, calls = described
+    index = KMSKeyIndex()
+
+    assert index.partition(["k"]) == (["k"], [])   # unknown metadata stays in scope
+    table["k"] = {**IN_SCOPE, "KeyManager": "AWS"}
+    assert index.partition(["k"])[1] == [{"key_id": "k", "reason": "aws_managed"}]
+    assert calls == ["k", "k"]
+
+
+def test_key_state_skip_is_rechecked(described):
+    table, calls = described
+    table["k"] = {**IN_SCOPE, "KeyState": "PendingDeletion"}
+    index = KMSKeyIndex()
+    assert index.partition(["k"]) == ([], [{"key_id": "k", "reason": "key_state:PendingDeletion"}])
+
+    table["k"] = IN_SCOPE   # CancelKeyDeletion + EnableKey
+    assert index.partition(["k"]) == (["k"], [])
+    index.partition(["k"])
+    assert calls == ["k", "k"]
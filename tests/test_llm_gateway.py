@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from utils.llm_gateway import FakeChatModel, LLMGateway
+
+
+class CountingModel(FakeChatModel):
+    """FakeChatModel that records how many calls run at once."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return super().invoke(prompt)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_gateway(latency=0.0, **kwargs):
+    gateway = LLMGateway(provider="fake", **kwargs)
+    gateway._client = CountingModel(latency)
+    return gateway
+
+
+def run_threads(fn, count):
+    threads = [threading.Thread(target=fn, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_cache_hits_and_lru_eviction():
+    gateway = make_gateway(cache_size=2)
+    first = gateway.invoke("summarize a")
+    again = gateway.invoke("summarize a")
+    assert (first.cached, again.cached, again.content) == (False, True, first.content)
+
+    gateway.invoke("summarize b")
+    gateway.invoke("summarize c")   # evicts "a"
+    assert not gateway.invoke("summarize a").cached
+    assert gateway.report()["cache_hits"] == 1
+    assert gateway.report()["cached_responses"] == 2
+
+
+def test_cache_false_always_calls():
+    gateway = make_gateway()
+    gateway.invoke("chat", cache=False)
+    gateway.invoke("chat", cache=False)
+    assert gateway.client.calls == 2
+    assert gateway.report()["cached_responses"] == 0
+
+
+def test_cache_if_vetoes_caching():
+    gateway = make_gateway()
+    gateway.invoke("not json", cache_if=lambda content: content.startswith("{"))
+    assert not gateway.invoke("not json", cache_if=lambda content: content.startswith("{")).cached
+
+    router = "AWS Audit Router prompt"
+    gateway.invoke(router, cache_if=lambda content: content.startswith("{"))
+    assert gateway.invoke(router).cached
+
+
+def test_identical_concurrent_prompts_are_coalesced():
+    gateway = make_gateway(latency=0.05)
+    run_threads(lambda i: gateway.invoke("same prompt"), 5)
+    assert gateway.client.calls == 1
+
+
+def test_concurrency_cap():
+    gateway = make_gateway(latency=0.05, max_concurrency=2)
+    run_threads(lambda i: gateway.invoke(f"prompt {i}"), 6)
+
+    assert gateway.client.peak == 2
+    assert gateway.report()["calls"] == 6
+    assert gateway.report()["queued"] >= 1
+
+
+def test_queue_timeout():
+    gateway = make_gateway(latency=0.3, max_concurrency=1, queue_timeout=0.05)
+    holder = threading.Thread(target=gateway.invoke, args=("slow",), kwargs={"cache": False})
+    holder.start()
+    while not gateway.client.active:
+        time.sleep(0.001)
+
+    with pytest.raises(TimeoutError):
+        gateway.invoke("queued", cache=False)
+    holder.join()
+    assert gateway.report()["timeouts"] == 1
@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+from utils.offline import OfflineAuditor, _StreamReader, iter_json_records
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_numbers_split_at_chunk_boundaries(chunk_size):
+    text = '[12345.678, -9e-3, 1000000, {"Average": 42.125}]'
+    reader = _StreamReader(io.StringIO(text), chunk_size=chunk_size)
+    assert list(reader.array_items()) == [12345.678, -9e-3, 1000000, {"Average": 42.125}]
+
+
+def test_trailing_number_at_eof():
+    reader = _StreamReader(io.StringIO("   31415"), chunk_size=2)
+    assert reader.value() == 31415
+
+
+def test_array_under_top_level_key(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.offline.CHUNK_SIZE", 5)
+    doc = {"ResponseMetadata": {"RequestId": "x"}, "Buckets": [{"Name": "a"}, {"Name": "b"}], "Owner": {}}
+    path = _write(tmp_path, "buckets.json", json.dumps(doc))
+    assert list(iter_json_records(path)) == [{"Name": "a"}, {"Name": "b"}]
+
+
+def test_top_level_array_and_jsonl(tmp_path):
+    path = _write(tmp_path, "keys.json", '[{"KeyId": "k1"}, {"KeyId": "k2"}]')
+    assert [r["KeyId"] for r in iter_json_records(path)] == ["k1", "k2"]
+
+    path = _write(tmp_path, "keys.jsonl", '{"KeyId": "k1"}\nnot json\n\n{"KeyId": "k2"}\n')
+    assert [r["KeyId"] for r in iter_json_records(path)] == ["k1", "k2"]
+
+
+def test_object_without_record_array_is_rejected(tmp_path):
+    path = _write(tmp_path, "buckets.json", '{"bucket-a": {"Name": "bucket-a"}, "bucket-b": {}}')
+    with pytest.raises(ValueError, match="no array"):
+        list(iter_json_records(path))
+
+
+def test_kms_listing_without_rotation_status_is_unknown(tmp_path):
+    path = _write(tmp_path, "keys.json", json.dumps({"Keys": [
+        {"KeyId": "listed-only", "KeyArn": "arn:aws:kms:eu-west-1:1:key/listed-only"},
+        {"KeyId": "aws", "KeyMetadata": {"KeyManager": "AWS"}, "KeyRotationEnabled": False},
+        {"KeyId": "off", "KeyRotationEnabled": False},
+    ]}))
+    auditor = OfflineAuditor()
+    results = list(auditor.iter_kms(path))
+
+    assert [r["key_id"] for r in results] == ["off"]
+    assert auditor.unknown_keys == ["listed-only"]
+    assert auditor.skipped_keys == [{"key_id": "aws", "reason": "aws_managed"}]
+
+
+def test_bucket_listing_without_configuration_is_unknown(tmp_path):
+    path = _write(tmp_path, "buckets.json", json.dumps({"Buckets": [
+        {"Name": "listed-only", "CreationDate": "2024-01-01"},
+        {"Name": "partial", "Versioning": {"Status": "Enabled"}},
+        {"Name": "unconfigured", "Versioning": {}, "Encryption": None, "PublicAccessBlock": None},
+    ]}))
+    auditor = OfflineAuditor()
+    results = list(auditor.iter_s3(path))
+
+    assert [(r["bucket"], len(r["actions"])) for r in results] == [("unconfigured", 3)]
+    assert auditor.unknown_buckets == ["listed-only", "partial"]
+
+
+def test_ec2_with_cpu_metrics(tmp_path):
+    instances = _write(tmp_path, "instances.json", json.dumps({"Reservations": [{"Instances": [
+        {"InstanceId": "i-idle", "State": {"Name": "running"}},
+        {"InstanceId": "i-busy", "State": {"Name": "running"}},
+    ]}]}))
+    metrics = _write(tmp_path, "cpu.jsonl", "\n".join(json.dumps(r) for r in [
+        {"InstanceId": "i-busy", "Average": 60.0},
+        {"InstanceId": "i-busy", "Average": 40.0},
+        {"InstanceId": "i-idle", "Datapoints": [{"Average": 1.0}]},
+    ]))
+    actions = {r["InstanceId"]: (r["AvgCPU"], r["Action"]) for r in OfflineAuditor().iter_ec2(instances, metrics)}
+    assert actions == {"i-idle": (1.0, "Terminated (or DRY_RUN)"), "i-busy": (50.0, "Active")}
@@ -0,0 +1,39 @@
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor, paginate, parse_fields
+
+
+def test_pages_are_sorted_by_id():
+    page, cursor = paginate(["i-c", "i-a", "i-d", "i-b"], limit=2)
+    assert page == ["i-a", "i-b"]
+    assert decode_cursor(cursor) == "i-b"
+
+    page, cursor = paginate(["i-d", "i-c", "i-b", "i-a"], cursor=cursor, limit=2)
+    assert page == ["i-c", "i-d"]
+    assert cursor is None
+
+
+def test_cursor_survives_deleted_resource():
+    _, cursor = paginate(["a", "b", "c", "d"], limit=2)
+    page, _ = paginate(["a", "c", "d"], cursor=cursor, limit=2)
+    assert page == ["c", "d"]
+
+
+def test_key_fn_and_unlimited():
+    items = [{"id": "b"}, {"id": "a"}]
+    page, cursor = paginate(items, key_fn=lambda item: item["id"])
+    assert [item["id"] for item in page] == ["a", "b"]
+    assert cursor is None
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        paginate(["a"], cursor="not-a-cursor!")
+    assert decode_cursor(encode_cursor("x/y")) == "x/y"
+
+
+def test_parse_fields():
+    assert parse_fields(None, ("a", "b")) == ["a", "b"]
+    assert parse_fields(" b, a ", ("a", "b")) == ["b", "a"]
+    with pytest.raises(ValueError):
+        parse_fields("c", ("a", "b"))
@@ -0,0 +1,57 @@
+from utils.rules import (
+    evaluate_bucket,
+    evaluate_key,
+    evaluate_instance,
+    public_access_open,
+    rotation_skip_reason,
+    running_instances,
+)
+
+
+def test_evaluate_bucket_compliant():
+    result = evaluate_bucket("b", versioning=True, encryption=True, public_access=False)
+    assert result == {
+        "bucket": "b",
+        "checks": {"versioning": True, "encryption": True, "public_access": False},
+        "actions": []
+    }
+
+
+def test_evaluate_bucket_all_failing():
+    result = evaluate_bucket("b", versioning=False, encryption=False, public_access=True)
+    assert result["actions"] == ["Enabled versioning", "Enabled AES256 encryption", "Blocked public access"]
+
+
+def test_evaluate_key():
+    assert evaluate_key("k", rotation_enabled=True)["actions"] == []
+    assert evaluate_key("k", rotation_enabled=False)["actions"] == ["Enabled key rotation"]
+
+
+def test_evaluate_instance_threshold():
+    inst = {"InstanceId": "i-1", "Name": "web"}
+    assert evaluate_instance(inst, 4.99)["Action"] == "Terminated (or DRY_RUN)"
+    assert evaluate_instance(inst, 5.0)["Action"] == "Active"
+    assert evaluate_instance(inst, 7.0, threshold=10.0)["Action"] == "Terminated (or DRY_RUN)"
+
+
+def test_public_access_open():
+    assert public_access_open(None) is True
+    assert public_access_open({"BlockPublicAcls": True, "IgnorePublicAcls": False}) is True
+    assert public_access_open({"BlockPublicAcls": True, "IgnorePublicAcls": True}) is False
+
+
+def test_rotation_skip_reason():
+    meta = {"KeyManager": "CUSTOMER", "KeyState": "Enabled", "KeySpec": "SYMMETRIC_DEFAULT", "Origin": "AWS_KMS"}
+    assert rotation_skip_reason(meta) is None
+    assert rotation_skip_reason({**meta, "KeyManager": "AWS"}) == "aws_managed"
+    assert rotation_skip_reason({**meta, "KeyState": "PendingDeletion"}) == "key_state:PendingDeletion"
+    assert rotation_skip_reason({**meta, "KeySpec": "RSA_2048"}) == "key_spec:RSA_2048"
+    assert rotation_skip_reason({**meta, "Origin": "EXTERNAL"}) == "origin:EXTERNAL"
+
+
+def test_running_instances_filters_state():
+    reservations = [{"Instances": [
+        {"InstanceId": "i-1", "State": {"Name": "running"}, "Tags": [{"Key": "Name", "Value": "web"}]},
+        {"InstanceId": "i-2", "State": {"Name": "stopped"}},
+    ]}]
+    assert running_instances(reservations) == [{"InstanceId": "i-1", "Name": "web"}]
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.sharding import LocalTaskQueue, make_shards, run_sharded
+
+
+def test_make_shards():
+    assert make_shards([], workers=4) == []
+    assert make_shards(list(range(10)), workers=1, shard_size=4) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    # ~4 shards per worker for load balancing
+    shards = make_shards(list(range(100)), workers=5)
+    assert len(shards) == 20
+    assert [item for shard in shards for item in shard] == list(range(100))
+
+
+def test_results_merged_in_input_order(monkeypatch):
+    monkeypatch.setenv("SYNTHETIC_LATENCY_SECONDS", "0")
+    items = [f"r-{i:03d}" for i in range(37)]
+    results = run_sharded("synthetic", items, workers=3, task_queue=LocalTaskQueue(), shard_size=2, timeout=60)
+    assert [r["id"] for r in results] == items
+
+
+def test_shard_error_fails_the_job(monkeypatch):
+    monkeypatch.setenv("SYNTHETIC_LATENCY_SECONDS", "not-a-number")  # evaluator raises in the worker
+    with pytest.raises(RuntimeError, match="failed: shard 0"):
+        run_sharded("synthetic", ["a"], workers=1, task_queue=LocalTaskQueue(), timeout=60)
+
+
+def test_empty_job_starts_no_workers():
+    class NoSpawn:
+        def Process(self, *args, **kwargs):
+            raise AssertionError("no worker should be spawned for an empty job")
+
+    task_queue = LocalTaskQueue()
+    task_queue.ctx = NoSpawn()
+    assert run_sharded("synthetic", [], workers=4, task_queue=task_queue) == []
+
+
+def test_unknown_service():
+    with pytest.raises(ValueError):
+        run_sharded("nope", ["a"])
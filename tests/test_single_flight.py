@@ -0,0 +1,66 @@
+import threading
+import time
+
+from utils.single_flight import CrossProcessLocks, ResourceLocks, SingleFlight
+
+
+def make_locks(tmp_path):
+    return ResourceLocks(CrossProcessLocks(lock_dir=str(tmp_path), redis_url=""))
+
+
+def test_lock_entries_are_dropped_after_release(tmp_path):
+    locks = make_locks(tmp_path)
+    for i in range(100):
+        with locks.hold("s3", f"bucket-{i}"):
+            assert ("s3", f"bucket-{i}") in locks._locks
+    assert locks._locks == {}
+
+
+def test_same_resource_is_serialized(tmp_path):
+    locks = make_locks(tmp_path)
+    inside, overlaps = [], []
+
+    def remediate():
+        with locks.hold("kms", "key"):
+            if inside:
+                overlaps.append(True)
+            inside.append(True)
+            time.sleep(0.02)
+            inside.pop()
+
+    threads = [threading.Thread(target=remediate) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == []
+    assert locks.contended >= 1
+    assert locks._locks == {}
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    group = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    leader = threading.Thread(target=lambda: results.append(group.do("k", compute)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(group.do("k", compute))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    while group.stats()["k"]["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert calls == [1]
+    assert results == ["result"] * 4
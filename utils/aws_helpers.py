@@ -3,6 +3,13 @@ import boto3
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError
 from utils.logger import get_logger
+from utils.rules import (
+    instance_name,
+    running_instances,
+    average_cpu,
+    versioning_enabled,
+    public_access_open,
+)
 from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
 load_dotenv()
@@ -29,15 +36,53 @@ def get_all_instances():
     instances = []
     try:
         resp = ec2.describe_instances(Filters=[{"Name": "instance-state-name", "Values": ["running"]}])
-        for reservation in resp["Reservations"]:
-            for instance in reservation["Instances"]:
-                name = next((t["Value"] for t in instance.get("Tags", []) if t["Key"] == "Name"), "Unnamed")
-                instances.append({"InstanceId": instance["InstanceId"], "Name": name})
+        instances = running_instances(resp["Reservations"])
     except ClientError as e:
         logger.error(f"Error fetching EC2 instances: {e}")
     return instances
 
 
+def iter_instance_pages(next_token: str = None, page_size: int = 1000):
+    """
+    Yield (instances, next_token) for each page of running instances,
+    starting from `next_token`. Errors are logged and re-raised so a
+    checkpointed scan is not mistaken for a finished one.
+    """
+    params = {
+        "Filters": [{"Name": "instance-state-name", "Values": ["running"]}],
+        "MaxResults": page_size,
+    }
+    while True:
+        if next_token:
+            params["NextToken"] = next_token
+        try:
+            resp = ec2.describe_instances(**params)
+        except ClientError as e:
+            logger.error(f"Error fetching EC2 instance page: {e}")
+            raise
+        instances = running_instances(resp["Reservations"])
+        next_token = resp.get("NextToken")
+        yield instances, next_token
+        if not next_token:
+            break
+
+
+def describe_instance(instance_id: str):
+    """Return ID + Name + state for a single instance, or None if not found."""
+    try:
+        resp = ec2.describe_instances(InstanceIds=[instance_id])
+        for reservation in resp["Reservations"]:
+            for instance in reservation["Instances"]:
+                return {
+                    "InstanceId": instance["InstanceId"],
+                    "Name": instance_name(instance),
+                    "State": instance["State"]["Name"],
+                }
+    except ClientError as e:
+        logger.error(f"Error describing EC2 instance {instance_id}: {e}")
+    return None
+
+
 def get_average_cpu_utilization(instance_id: str, hours: int = 48) -> float:
     """Fetch average CPU utilization over the past `hours` from CloudWatch."""
     end_time = datetime.utcnow()
@@ -52,11 +97,7 @@ def get_average_cpu_utilization(instance_id: str, hours: int = 48) -> float:
             Period=3600,
             Statistics=["Average"]
         )
-        datapoints = metrics.get("Datapoints", [])
-        if not datapoints:
-            return 0.0
-        avg_cpu = sum(d["Average"] for d in datapoints) / len(datapoints)
-        return avg_cpu
+        return average_cpu(metrics.get("Datapoints", []))
     except ClientError as e:
         logger.error(f"Error fetching CPU for {instance_id}: {e}")
         return 0.0
@@ -102,11 +143,31 @@ def list_buckets():
         return []
 
 
+def iter_bucket_pages(continuation_token: str = None, page_size: int = 1000):
+    """
+    Yield (bucket_names, continuation_token) for each page of buckets,
+    starting from `continuation_token`. Errors are logged and re-raised.
+    """
+    params = {"MaxBuckets": page_size}
+    while True:
+        if continuation_token:
+            params["ContinuationToken"] = continuation_token
+        try:
+            resp = s3.list_buckets(**params)
+        except ClientError as e:
+            logger.error(f"Error listing S3 bucket page: {e}")
+            raise
+        continuation_token = resp.get("ContinuationToken")
+        yield [b["Name"] for b in resp.get("Buckets", [])], continuation_token
+        if not continuation_token:
+            break
+
+
 def check_s3_versioning(bucket: str) -> bool:
     """Return True if versioning is enabled."""
     try:
         resp = s3.get_bucket_versioning(Bucket=bucket)
-        return resp.get("Status") == "Enabled"
+        return versioning_enabled(resp)
     except ClientError as e:
         logger.error(f"Error checking versioning for {bucket}: {e}")
         return False
@@ -156,14 +217,10 @@ def is_public_access_enabled(bucket: str) -> bool:
     """Check if public access is currently allowed for a bucket."""
     try:
         resp = s3.get_public_access_block(Bucket=bucket)
-        config = resp["PublicAccessBlockConfiguration"]
-        # If any flag is False, public access might be open
-        if not all(config.values()):
-            return True
-        return False
+        return public_access_open(resp["PublicAccessBlockConfiguration"])
     except ClientError as e:
         if "NoSuchPublicAccessBlockConfiguration" in str(e):
-            return True  # No configuration = public access allowed
+            return public_access_open(None)
         logger.error(f"Error checking public access for {bucket}: {e}")
         return True
 
@@ -206,6 +263,15 @@ def get_kms_keys():
         return []
 
 
+def describe_kms_key(key_id: str):
+    """Return the KeyMetadata dict for a key (manager, state, spec...), or None on error."""
+    try:
+        return kms.describe_key(KeyId=key_id)["KeyMetadata"]
+    except ClientError as e:
+        logger.error(f"Error describing KMS key {key_id}: {e}")
+        return None
+
+
 def check_key_rotation(key_id: str) -> bool:
     """Return True if key rotation is enabled."""
     try:
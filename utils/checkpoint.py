@@ -0,0 +1,131 @@
+"""
+Resumable, checkpointed scans.
+
+Each scan (kind + scan_id) has an append-only JSONL log under checkpoints/:
+  {"type": "page",     "items": [...], "next": <pagination marker or null>}
+  {"type": "result",   "id": <resource id>, "result": {...}}
+  {"type": "complete"}
+
+Appending one line per resource keeps checkpoint cost constant per
+resource. On restart the log is replayed: finished resources are not
+re-checked, recorded pages are not re-fetched, and listing resumes from
+the last pagination marker.
+"""
+import json
+import os
+import re
+
+from utils.logger import get_logger
+
+logger = get_logger("Checkpoint")
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "checkpoints")
+
+_SCAN_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+class ScanCheckpoint:
+
+    def __init__(self, kind: str, scan_id: str):
+        if not _SCAN_ID_RE.match(scan_id or ""):
+            raise ValueError("scan_id must be 1-128 characters of letters, digits, '.', '_' or '-'")
+
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        self.path = os.path.join(CHECKPOINT_DIR, f"{kind}-{scan_id}.jsonl")
+
+        self.inventory = []
+        self.next_token = None
+        self.inventory_complete = False
+        self.results = {}
+        self.completed = False
+
+        self._load()
+
+    # --------------------------------------------
+    # Replay existing log
+    # --------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                # A torn final line (process died mid-write) is dropped
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(raw)
+                except json.JSONDecodeError:
+                    break
+                valid_bytes += len(raw)
+                self._apply(entry)
+
+        if valid_bytes < os.path.getsize(self.path):
+            logger.warning(f"Truncating torn checkpoint tail in {self.path}")
+            with open(self.path, "rb+") as f:
+                f.truncate(valid_bytes)
+
+        logger.info(
+            f"♻️  Resuming from checkpoint {self.path}: {len(self.results)}/{len(self.inventory)} "
+            f"resources done, inventory {'complete' if self.inventory_complete else 'partial'}"
+        )
+
+    def _apply(self, entry: dict):
+        if entry["type"] == "page":
+            self.inventory.extend(entry["items"])
+            self.next_token = entry["next"]
+            self.inventory_complete = not entry["next"]
+        elif entry["type"] == "result":
+            self.results[entry["id"]] = entry["result"]
+        elif entry["type"] == "complete":
+            self.completed = True
+
+    def _append(self, entry: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+        self._apply(entry)
+
+    # --------------------------------------------
+    # Recording progress
+    # --------------------------------------------
+    def record_page(self, items: list, next_token):
+        self._append({"type": "page", "items": items, "next": next_token})
+
+    def record_result(self, resource_id: str, result):
+        self._append({"type": "result", "id": resource_id, "result": result})
+
+    def mark_complete(self):
+        if not self.completed:
+            self._append({"type": "complete"})
+
+
+def run_checkpointed(checkpoint: ScanCheckpoint, pages, key_fn, audit_fn) -> list:
+    """
+    Drive a resumable scan.
+
+    - pages(next_token) yields (items, next_token) starting at a pagination marker
+    - key_fn(item) returns the resource id for an inventory item
+    - audit_fn(item) checks one resource and returns its JSON-serializable result
+
+    Returns the results in inventory order, identical to an uninterrupted run.
+    """
+    def process(items):
+        for item in items:
+            resource_id = key_fn(item)
+            if resource_id not in checkpoint.results:
+                checkpoint.record_result(resource_id, audit_fn(item))
+
+    if not checkpoint.completed:
+        # Finish resources from pages that were already listed...
+        process(list(checkpoint.inventory))
+
+        # ...then continue listing from the saved marker
+        if not checkpoint.inventory_complete:
+            for items, next_token in pages(checkpoint.next_token):
+                checkpoint.record_page(items, next_token)
+                process(items)
+
+        checkpoint.mark_complete()
+
+    return [checkpoint.results[key_fn(item)] for item in checkpoint.inventory]
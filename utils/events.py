@@ -0,0 +1,201 @@
+"""
+Resource-change event handling for continuous compliance.
+
+- Maps CloudTrail / EventBridge style JSON to (service, resource_id) pairs
+- Debounces bursts of events per resource and releases them in batches
+- Reads events from a local queue or a JSONL file stand-in
+"""
+import json
+import os
+import queue
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger("Events")
+
+
+# ============================================================
+# Event → resource mapping
+# ============================================================
+
+def _kms_key_id(value: str) -> str:
+    """
+    Strip an ARN down to the bare key id. Aliases (alias/... or alias ARNs)
+    are kept as-is: only describe_key can map them to a key, see is_kms_alias.
+    """
+    if value and value.startswith("arn:") and ":key/" in value:
+        return value.split(":key/", 1)[1]
+    return value
+
+
+def is_kms_alias(value: str) -> bool:
+    return value.startswith("alias/") or (value.startswith("arn:") and ":alias/" in value)
+
+
+def _instance_ids(section: dict) -> list:
+    """Collect instance IDs from a CloudTrail `instancesSet` block."""
+    items = (section or {}).get("instancesSet", {}).get("items", [])
+    return [i["instanceId"] for i in items if i.get("instanceId")]
+
+
+def _resources_from_record(record: dict) -> list:
+    """Map a single CloudTrail record to affected (service, resource_id) pairs."""
+    source = record.get("eventSource", "")
+    params = record.get("requestParameters") or {}
+    response = record.get("responseElements") or {}
+    found = []
+
+    if source == "s3.amazonaws.com":
+        bucket = params.get("bucketName")
+        if bucket:
+            found.append(("s3", bucket))
+
+    elif source == "kms.amazonaws.com":
+        key_id = params.get("keyId") or (response.get("keyMetadata") or {}).get("keyId")
+        if key_id:
+            found.append(("kms", _kms_key_id(key_id)))
+        for res in record.get("resources", []):
+            if res.get("ARN", "").startswith("arn:aws:kms") and ":key/" in res["ARN"]:
+                found.append(("kms", _kms_key_id(res["ARN"])))
+
+    elif source == "ec2.amazonaws.com":
+        instance_id = params.get("instanceId")
+        if instance_id:
+            found.append(("ec2", instance_id))
+        for instance_id in _instance_ids(params) + _instance_ids(response):
+            found.append(("ec2", instance_id))
+
+    return found
+
+
+def resources_from_event(event: dict) -> list:
+    """
+    Return the unique (service, resource_id) pairs affected by an event.
+    Accepts raw CloudTrail records, CloudTrail log files ({"Records": [...]}),
+    EventBridge "AWS API Call via CloudTrail" envelopes and native
+    EventBridge S3 / EC2 notifications.
+    """
+    if not isinstance(event, dict):
+        return []
+
+    if "Records" in event:
+        found = []
+        for record in event["Records"]:
+            found.extend(resources_from_event(record))
+        return list(dict.fromkeys(found))
+
+    detail = event.get("detail")
+    if isinstance(detail, dict):
+        if "eventSource" in detail:
+            found = _resources_from_record(detail)
+        elif event.get("source") == "aws.s3" and "bucket" in detail:
+            found = [("s3", detail["bucket"]["name"])]
+        elif event.get("source") == "aws.ec2" and "instance-id" in detail:
+            found = [("ec2", detail["instance-id"])]
+        else:
+            found = []
+    else:
+        found = _resources_from_record(event)
+
+    return list(dict.fromkeys(found))
+
+
+# ============================================================
+# Debouncer
+# ============================================================
+
+class EventDebouncer:
+    """
+    Collects resource touches and releases each resource once it has been
+    quiet for `debounce_seconds`, or after `max_wait_seconds` even if events
+    keep arriving. A burst of N events for one bucket becomes one re-check.
+    """
+
+    def __init__(self, debounce_seconds: float = 2.0, max_wait_seconds: float = 10.0, clock=time.monotonic):
+        self.debounce_seconds = debounce_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.clock = clock
+        # (service, resource_id) -> {"first": t, "last": t, "events": n}
+        self.pending = {}
+
+    def add(self, service: str, resource_id: str):
+        now = self.clock()
+        entry = self.pending.get((service, resource_id))
+        if entry is None:
+            self.pending[(service, resource_id)] = {"first": now, "last": now, "events": 1}
+        else:
+            entry["last"] = now
+            entry["events"] += 1
+
+    def ready(self) -> dict:
+        """Pop and return ready resources grouped by service: {service: [ids]}."""
+        now = self.clock()
+        batch = {}
+        for key, entry in list(self.pending.items()):
+            quiet = now - entry["last"] >= self.debounce_seconds
+            overdue = now - entry["first"] >= self.max_wait_seconds
+            if quiet or overdue:
+                service, resource_id = key
+                batch.setdefault(service, []).append(resource_id)
+                del self.pending[key]
+        return batch
+
+    def __len__(self):
+        return len(self.pending)
+
+
+# ============================================================
+# Event sources
+# ============================================================
+
+def drain_queue(q: queue.Queue, timeout: float = 0.5) -> list:
+    """Block up to `timeout` for the first event, then drain whatever else is queued."""
+    events = []
+    try:
+        events.append(q.get(timeout=timeout))
+        while True:
+            events.append(q.get_nowait())
+    except queue.Empty:
+        pass
+    return events
+
+
+class JSONLEventFile:
+    """
+    Local file stand-in for an event bus: one JSON event per line.
+    Keeps its read offset so repeated `read_new()` calls only return
+    events appended since the last call (like `tail -f`).
+    """
+
+    def __init__(self, path: str, from_start: bool = False):
+        self.path = path
+        self.offset = 0
+        if not from_start and os.path.exists(path):
+            self.offset = os.path.getsize(path)
+
+    def read_new(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+
+        # File was truncated / rotated → start over
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0
+
+        events = []
+        with open(self.path, "r") as f:
+            f.seek(self.offset)
+            while True:
+                line = f.readline()
+                # Partial line still being written → pick it up next time
+                if not line or not line.endswith("\n"):
+                    break
+                self.offset = f.tell()
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.error(f"Skipping invalid event line in {self.path}: {line[:200]}")
+        return events
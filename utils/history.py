@@ -0,0 +1,310 @@
+"""
+Compliance history time-series store (SQLite).
+
+Every audit run's structured findings are recorded as:
+  - scan_totals:  failing/total count per (service, check) per scan
+  - rollups:      daily + weekly aggregates, upserted at write time
+  - transitions:  per-resource changes only (compact drift log)
+  - resource_state: current value per (service, resource, check)
+
+Raw per-scan totals older than HISTORY_RAW_RETENTION_DAYS are pruned
+after being rolled up, so a year of hourly scans stays small and trend
+queries only touch a few hundred rollup rows.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from utils.logger import get_logger
+
+logger = get_logger("History")
+
+HISTORY_DB = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "memory",
+    "compliance_history.db"
+)
+
+DAY = 86400
+
+# check name -> rule on the agent's per-resource result (True = failing)
+S3_CHECKS = {
+    "versioning_disabled": lambda r: not r["checks"].get("versioning"),
+    "encryption_disabled": lambda r: not r["checks"].get("encryption"),
+    "public_access": lambda r: bool(r["checks"].get("public_access")),
+}
+KMS_CHECKS = {
+    "rotation_disabled": lambda r: not r.get("rotation_enabled"),
+}
+EC2_CHECKS = {
+    "idle": lambda r: r.get("Action") != "Active",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_totals (
+    ts INTEGER NOT NULL,
+    service TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    failing INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scan_totals ON scan_totals (service, check_name, ts);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    service TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    failing_sum INTEGER NOT NULL,
+    failing_min INTEGER NOT NULL,
+    failing_max INTEGER NOT NULL,
+    failing_last INTEGER NOT NULL,
+    total_last INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    PRIMARY KEY (granularity, service, check_name, bucket_start)
+);
+
+CREATE TABLE IF NOT EXISTS resource_state (
+    service TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    failing INTEGER NOT NULL,
+    since_ts INTEGER NOT NULL,
+    PRIMARY KEY (service, resource_id, check_name)
+);
+
+CREATE TABLE IF NOT EXISTS transitions (
+    ts INTEGER NOT NULL,
+    service TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    old_failing INTEGER,
+    new_failing INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_resource ON transitions (service, resource_id, ts);
+CREATE INDEX IF NOT EXISTS idx_transitions_ts ON transitions (service, ts);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO rollups (granularity, bucket_start, service, check_name, samples,
+                     failing_sum, failing_min, failing_max, failing_last, total_last, last_ts)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, service, check_name, bucket_start) DO UPDATE SET
+    samples = samples + 1,
+    failing_sum = failing_sum + excluded.failing_sum,
+    failing_min = MIN(failing_min, excluded.failing_min),
+    failing_max = MAX(failing_max, excluded.failing_max),
+    failing_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.failing_last ELSE failing_last END,
+    total_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.total_last ELSE total_last END,
+    last_ts = MAX(last_ts, excluded.last_ts)
+"""
+
+
+def day_start(ts: int) -> int:
+    return ts - ts % DAY
+
+
+def week_start(ts: int) -> int:
+    """Start of the ISO week (Monday 00:00 UTC). 1970-01-01 was a Thursday."""
+    day = ts // DAY
+    return (day - (day + 3) % 7) * DAY
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def extract_findings(service: str, result) -> dict:
+    """
+    Normalize an agent result into {resource_id: {check_name: failing}}.
+    Accepts S3Agent / KMSAgent findings lists and EC2Agent's {"ec2": [...]}.
+    """
+    service = service.upper()
+    findings = {}
+
+    if service == "S3":
+        for r in result or []:
+            findings[r["bucket"]] = {name: rule(r) for name, rule in S3_CHECKS.items()}
+    elif service == "KMS":
+        for r in result or []:
+            findings[r["key_id"]] = {name: rule(r) for name, rule in KMS_CHECKS.items()}
+    elif service == "EC2":
+        items = result.get("ec2") if isinstance(result, dict) else result
+        for r in items if isinstance(items, list) else []:
+            findings[r["InstanceId"]] = {name: rule(r) for name, rule in EC2_CHECKS.items()}
+    else:
+        raise ValueError(f"Unknown service: {service}")
+
+    return findings
+
+
+class HistoryStore:
+
+    def __init__(self, path: str = HISTORY_DB, raw_retention_days: int = None):
+        self.path = path
+        if raw_retention_days is None:
+            raw_retention_days = int(os.getenv("HISTORY_RAW_RETENTION_DAYS", "90"))
+        self.raw_retention = raw_retention_days * DAY
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --------------------------------------------
+    # Write path
+    # --------------------------------------------
+    def record_run(self, results: dict, ts: int = None):
+        """
+        Record one audit run. `results` maps service → agent result,
+        e.g. {"S3": [...], "KMS": [...], "EC2": {"ec2": [...]}} (MasterAgent shape).
+        """
+        ts = int(ts if ts is not None else time.time())
+
+        with self._connect() as conn:
+            for service, result in results.items():
+                findings = extract_findings(service, result)
+                if not findings:
+                    continue
+                service = service.upper()
+                self._record_totals(conn, service, findings, ts)
+                self._record_transitions(conn, service, findings, ts)
+
+            conn.execute("DELETE FROM scan_totals WHERE ts < ?", (ts - self.raw_retention,))
+
+        logger.info(f"📈 Recorded compliance history for {', '.join(results)}")
+
+    def _record_totals(self, conn, service: str, findings: dict, ts: int):
+        checks = {name for per_resource in findings.values() for name in per_resource}
+        for check_name in checks:
+            values = [c[check_name] for c in findings.values() if check_name in c]
+            failing, total = sum(1 for v in values if v), len(values)
+
+            conn.execute(
+                "INSERT INTO scan_totals (ts, service, check_name, failing, total) VALUES (?, ?, ?, ?, ?)",
+                (ts, service, check_name, failing, total)
+            )
+            for granularity, start in (("day", day_start(ts)), ("week", week_start(ts))):
+                conn.execute(ROLLUP_UPSERT, (
+                    granularity, start, service, check_name,
+                    failing, failing, failing, failing, total, ts
+                ))
+
+    def _record_transitions(self, conn, service: str, findings: dict, ts: int):
+        current = {
+            (row["resource_id"], row["check_name"]): row["failing"]
+            for row in conn.execute(
+                "SELECT resource_id, check_name, failing FROM resource_state WHERE service = ?",
+                (service,)
+            )
+        }
+
+        changes = []
+        for resource_id, checks in findings.items():
+            for check_name, failing in checks.items():
+                failing = int(failing)
+                old = current.get((resource_id, check_name))
+                if old != failing:
+                    changes.append((resource_id, check_name, old, failing))
+
+        if not changes:
+            return
+
+        conn.executemany(
+            "INSERT INTO transitions (ts, service, resource_id, check_name, old_failing, new_failing) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(ts, service, rid, check, old, new) for rid, check, old, new in changes]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO resource_state (service, resource_id, check_name, failing, since_ts) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(service, rid, check, new, ts) for rid, check, _, new in changes]
+        )
+
+    # --------------------------------------------
+    # Read path
+    # --------------------------------------------
+    def trend(self, service: str, check_name: str = None, granularity: str = "day",
+              since: int = None, until: int = None) -> list:
+        """Failing-count series per check. granularity: scan | day | week."""
+        service = service.upper()
+        since = since or 0
+        until = until or int(time.time()) + 1
+        check_sql, check_args = ("AND check_name = ?", [check_name]) if check_name else ("", [])
+
+        with self._connect() as conn:
+            if granularity == "scan":
+                rows = conn.execute(
+                    f"SELECT ts, check_name, failing, total FROM scan_totals "
+                    f"WHERE service = ? {check_sql} AND ts >= ? AND ts < ? ORDER BY ts",
+                    [service, *check_args, since, until]
+                ).fetchall()
+                return [
+                    {"time": _iso(r["ts"]), "check": r["check_name"], "failing": r["failing"], "total": r["total"]}
+                    for r in rows
+                ]
+
+            if granularity not in ("day", "week"):
+                raise ValueError("granularity must be one of: scan, day, week")
+
+            rows = conn.execute(
+                f"SELECT * FROM rollups WHERE granularity = ? AND service = ? {check_sql} "
+                f"AND bucket_start >= ? AND bucket_start < ? ORDER BY bucket_start",
+                [granularity, service, *check_args,
+                 day_start(since) if granularity == "day" else week_start(since), until]
+            ).fetchall()
+
+        return [
+            {
+                "time": _iso(r["bucket_start"]),
+                "check": r["check_name"],
+                "scans": r["samples"],
+                "failing_avg": round(r["failing_sum"] / r["samples"], 2),
+                "failing_min": r["failing_min"],
+                "failing_max": r["failing_max"],
+                "failing_last": r["failing_last"],
+                "total_last": r["total_last"],
+            }
+            for r in rows
+        ]
+
+    def resource_checks(self, service: str, resource_id: str) -> dict:
+        """Last recorded {check_name: failing} for one resource ({} if never audited)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT check_name, failing FROM resource_state WHERE service = ? AND resource_id = ?",
+                (service.upper(), resource_id)
+            ).fetchall()
+        return {r["check_name"]: bool(r["failing"]) for r in rows}
+
+    def resource_drift(self, service: str, resource_id: str, since: int = None, until: int = None) -> list:
+        """Every recorded change for one resource (first sighting included)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ts, check_name, old_failing, new_failing FROM transitions "
+                "WHERE service = ? AND resource_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (service.upper(), resource_id, since or 0, until or int(time.time()) + 1)
+            ).fetchall()
+        return [
+            {
+                "time": _iso(r["ts"]),
+                "check": r["check_name"],
+                "was_failing": None if r["old_failing"] is None else bool(r["old_failing"]),
+                "is_failing": bool(r["new_failing"]),
+            }
+            for r in rows
+        ]
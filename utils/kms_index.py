@@ -0,0 +1,98 @@
+"""
+Cached KMS key metadata index.
+
+Rotation can only be changed on ENABLED, CUSTOMER-managed, symmetric keys
+with AWS_KMS key material. Everything else (AWS-managed, pending deletion,
+disabled, asymmetric/HMAC, imported material) is skipped BEFORE any
+rotation call is made. Metadata comes from `describe_key` and is cached:
+KeyManager, KeySpec and Origin never change, so in-scope and permanently
+out-of-scope keys are described once. Keys whose describe failed, or that
+were skipped for their KeyState (disabled, pending deletion...), are
+re-described on every refresh, since that state can be reverted.
+"""
+import threading
+
+from utils.aws_helpers import describe_kms_key
+from utils.logger import get_logger
+from utils.rules import rotation_skip_reason
+
+logger = get_logger("KMSKeyIndex")
+
+
+class KMSKeyIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_set = frozenset()
+        self.metadata = {}    # key_id -> KeyMetadata (or None if describe failed)
+        self.stats = {"describe_calls": 0, "rotation_calls_saved": 0, "refreshes": 0}
+
+    @staticmethod
+    def _stale(meta) -> bool:
+        if meta is None:
+            return True
+        reason = rotation_skip_reason(meta)
+        return bool(reason) and reason.startswith("key_state:")
+
+    def refresh(self, keys: list):
+        """
+        Re-index when the key list changed, describing only keys not seen
+        before, plus any key whose describe failed or whose KeyState may have
+        been reverted. Call under _lock.
+        """
+        key_set = frozenset(keys)
+        stale = {key_id for key_id in key_set & self._key_set if self._stale(self.metadata.get(key_id))}
+        if key_set == self._key_set and not stale:
+            return
+
+        self.stats["refreshes"] += 1
+        for key_id in (key_set - self._key_set) | stale:
+            self.metadata[key_id] = describe_kms_key(key_id)
+            self.stats["describe_calls"] += 1
+        for key_id in self._key_set - key_set:
+            self.metadata.pop(key_id, None)
+        self._key_set = key_set
+        logger.info(f"🗂️  KMS key index refreshed ({len(key_set)} keys)")
+
+    def describe(self, key_id: str):
+        """
+        Fresh describe_key for one key id or alias (a change event may have
+        just altered its state). Updates the cached entry of an indexed key.
+        """
+        meta = describe_kms_key(key_id)
+        with self._lock:
+            self.stats["describe_calls"] += 1
+            if meta and meta["KeyId"] in self._key_set:
+                self.metadata[meta["KeyId"]] = meta
+        return meta
+
+    def partition(self, keys: list):
+        """
+        Split `keys` into (in_scope, skipped) where skipped is a list of
+        {"key_id", "reason"}. Keys whose metadata could not be fetched stay in scope.
+        """
+        with self._lock:
+            self.refresh(keys)
+
+            in_scope, skipped = [], []
+            for key_id in keys:
+                meta = self.metadata.get(key_id)
+                reason = rotation_skip_reason(meta) if meta else None
+                if reason:
+                    skipped.append({"key_id": key_id, "reason": reason})
+                else:
+                    in_scope.append(key_id)
+
+            self.stats["rotation_calls_saved"] += len(skipped)
+
+        if skipped:
+            logger.info(f"⏭️  Skipped {len(skipped)} out-of-scope KMS key(s) — rotation calls saved")
+        return in_scope, skipped
+
+    def report(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+# Shared across requests so the describe_key results are reused
+kms_key_index = KMSKeyIndex()
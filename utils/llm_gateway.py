@@ -0,0 +1,190 @@
+"""
+Shared LLM gateway.
+
+- ONE chat client per process (connection pool reused across requests)
+- Global concurrency cap; extra callers queue for a slot (bounded wait)
+- Per-call timeout on the underlying client
+- Content-addressed response cache keyed by sha256(model + prompt);
+  identical concurrent prompts are coalesced onto one call
+- LLM_PROVIDER=fake gives an offline, deterministic model for tests/benchmarks
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.logger import get_logger
+from utils.single_flight import SingleFlight
+
+logger = get_logger("LLMGateway")
+
+
+class LLMResponse:
+    """Minimal response object — call sites only use `.content`."""
+
+    def __init__(self, content: str, cached: bool = False):
+        self.content = content
+        self.cached = cached
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for ChatOpenAI. Deterministic: router prompts get a
+    "run everything" JSON decision, anything else gets a digest-stamped summary.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def invoke(self, prompt: str):
+        if self.latency:
+            time.sleep(self.latency)
+        if "AWS Audit Router" in prompt or "strict JSON" in prompt:
+            content = json.dumps({
+                "run_ec2": True,
+                "run_s3": True,
+                "run_kms": True,
+                "reason": "fake model: run all agents"
+            })
+        else:
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+            content = f"[fake-llm {digest}] Audit summary for {len(prompt)} characters of input."
+        return LLMResponse(content)
+
+
+class LLMGateway:
+
+    def __init__(self, model: str = "gpt-4o-mini", provider: str = "openai",
+                 max_concurrency: int = 4, timeout: float = 60.0,
+                 queue_timeout: float = 120.0, cache_size: int = 256):
+        self.model = model
+        self.provider = provider
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.cache_size = cache_size
+
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._in_flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "cache_hits": 0, "queued": 0, "timeouts": 0}
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    # -----------------------------------------------------
+    # Shared client
+    # -----------------------------------------------------
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        if self.provider == "fake":
+            logger.info("🧪 Using offline fake LLM")
+            return FakeChatModel(latency=float(os.getenv("FAKE_LLM_LATENCY", "0")))
+
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=self.model,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=self.timeout,
+            max_retries=2,
+        )
+
+    # -----------------------------------------------------
+    # Cache
+    # -----------------------------------------------------
+    def digest(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str):
+        with self._cache_lock:
+            content = self._cache.get(key)
+            if content is not None:
+                self._cache.move_to_end(key)
+                self._count("cache_hits")
+            return content
+
+    def _cache_put(self, key: str, content: str):
+        with self._cache_lock:
+            self._cache[key] = content
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -----------------------------------------------------
+    # Calls
+    # -----------------------------------------------------
+    def _call(self, prompt: str) -> str:
+        if not self._slots.acquire(blocking=False):
+            self._count("queued")
+            logger.info("⏳ LLM concurrency cap reached — queueing call")
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                self._count("timeouts")
+                raise TimeoutError(f"Timed out after {self.queue_timeout}s waiting for an LLM slot")
+        try:
+            self._count("calls")
+            return self.client.invoke(prompt).content
+        finally:
+            self._slots.release()
+
+    def invoke(self, prompt, cache: bool = True, cache_if=None) -> LLMResponse:
+        """
+        Drop-in for `ChatOpenAI.invoke(prompt)` — returns an object with `.content`.
+        `cache_if(content)` can veto caching a response (e.g. one that failed to parse).
+        """
+        prompt = str(prompt)
+        if not cache:
+            return LLMResponse(self._call(prompt))
+
+        key = self.digest(prompt)
+        content = self._cache_get(key)
+        if content is not None:
+            return LLMResponse(content, cached=True)
+
+        def _compute():
+            result = self._call(prompt)
+            if cache_if is None or cache_if(result):
+                self._cache_put(key, result)
+            return result
+
+        return LLMResponse(self._in_flight.do(key, _compute))
+
+    def report(self) -> dict:
+        with self._cache_lock:
+            cached = len(self._cache)
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {"model": self.model, "provider": self.provider, "cached_responses": cached, **stats}
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway, configured from the environment on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway(
+                    model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+                    provider=os.getenv("LLM_PROVIDER", "openai").lower(),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+                    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "120")),
+                    cache_size=int(os.getenv("LLM_CACHE_SIZE", "256")),
+                )
+    return _gateway
@@ -2,6 +2,8 @@ import os
 import json
 from datetime import datetime
 
+from utils.history import HistoryStore
+
 # Full path to memory file
 MEMORY_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
@@ -72,7 +74,8 @@ class AgentMemory:
     # --------------------------------------------
     # Save audit run
     # --------------------------------------------
-    def save_run(self, agent: str, summary: str):
+    def save_run(self, agent: str, summary: str, results: dict = None):
+        """Store the summary; structured `results` also go to the history store."""
         data = self.read_memory()
 
         data["runs"].append({
@@ -83,6 +86,9 @@ class AgentMemory:
 
         self._write_memory(data)
 
+        if results:
+            HistoryStore().record_run(results)
+
     # --------------------------------------------
     # Convert chat history to text
     # --------------------------------------------
@@ -0,0 +1,331 @@
+"""
+Offline audit mode over exported inventory dumps (no AWS access).
+
+Streams JSON / JSONL exports with bounded memory and runs them through
+the SAME rules as the live agents (utils.rules). Nothing is remediated;
+the "actions" in the output are what a live run would have done.
+
+Accepted dumps (JSON, or JSONL with one record per line):
+  EC2 instances  describe_instances pages ({"Reservations": [...]}),
+                 reservations or raw instance objects
+  CPU metrics    {"InstanceId": "i-..", "Datapoints": [...]},
+                 {"InstanceId": "i-..", "Average": 1.2} per datapoint, or
+                 get_metric_data output ({"MetricDataResults": [{"Label": "i-..", "Values": [...]}]})
+  S3 buckets     {"Name": "..", "Versioning": {...}, "Encryption": {...} | null,
+                  "PublicAccessBlock": {...} | null}
+                 (null = not configured; buckets missing any of these keys,
+                 e.g. a bare list_buckets dump, are reported as unknown)
+  KMS keys       {"KeyId": "..", "KeyMetadata": {...}, "KeyRotationEnabled": bool}
+                 (keys without KeyRotationEnabled, e.g. a bare list_keys
+                 dump, are reported as unknown, not as non-compliant)
+
+Usage:
+  python -m utils.offline --s3 buckets.jsonl --kms keys.json \\
+      --ec2 instances.json --cpu-metrics cpu.jsonl --out findings.jsonl
+"""
+import argparse
+import json
+import sys
+
+from utils.logger import get_logger
+from utils.rules import (
+    running_instances,
+    versioning_enabled,
+    encryption_enabled,
+    public_access_open,
+    rotation_skip_reason,
+    evaluate_bucket,
+    evaluate_key,
+    evaluate_instance,
+)
+
+logger = get_logger("OfflineAudit")
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Top-level keys whose array holds the records in a single JSON document
+RECORD_KEYS = ("Reservations", "Instances", "Buckets", "Keys", "MetricDataResults")
+
+# Bucket configuration a dump must carry for the bucket to be evaluated
+S3_CONFIG_KEYS = ("Versioning", "Encryption", "PublicAccessBlock")
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+# ============================================================
+# Streaming JSON reader
+# ============================================================
+
+class _StreamReader:
+    """Chunked text buffer that decodes one JSON value at a time."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so memory stays ~ one chunk + one record
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at EOF), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if c not in chars or not c:
+            raise ValueError(f"Malformed JSON dump: expected one of {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # "12" or "12." may be the start of "12.5e3" cut at the chunk edge
+            if (isinstance(obj, (int, float)) and not isinstance(obj, bool)
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self):
+        """Yield the elements of the array whose '[' is next in the stream."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_records(path: str, record_keys=RECORD_KEYS):
+    """
+    Stream records from a dump without loading it whole:
+      - .jsonl / .ndjson: one JSON value per line
+      - top-level array: each element
+      - top-level object: elements of any `record_keys` array; other
+        members are skipped. An object with no such array (e.g. a dump
+        keyed by resource name) is rejected with a ValueError.
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, "r") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.error(f"Skipping invalid JSON on line {line_no} of {path}")
+        return
+
+    with open(path, "r") as f:
+        reader = _StreamReader(f)
+        first = reader.peek()
+
+        if first == "[":
+            yield from reader.array_items()
+            return
+        if first != "{":
+            raise ValueError(f"{path}: expected a JSON array or object")
+
+        reader.expect("{")
+        found = False
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key in record_keys and reader.peek() == "[":
+                    found = True
+                    yield from reader.array_items()
+                else:
+                    reader.value()  # decoded one member at a time, then dropped
+                if reader.expect(",}") == "}":
+                    break
+
+        if not found:
+            raise ValueError(
+                f"{path}: top-level object has no array under any of {', '.join(record_keys)}; "
+                f"export records as a JSON array or JSONL (one record per line)"
+            )
+
+
+# ============================================================
+# Record normalizers
+# ============================================================
+
+def _instances(record: dict):
+    """Running {InstanceId, Name} entries from a page, reservation or instance record."""
+    if "Reservations" in record:
+        return running_instances(record["Reservations"])
+    if "Instances" in record:
+        return running_instances([record])
+    if "InstanceId" in record:
+        return running_instances([{"Instances": [record]}])
+    return []
+
+
+def _metric_samples(record: dict):
+    """Yield (instance_id, [values]) from the supported CPU metric export shapes."""
+    if "MetricDataResults" in record:
+        for result in record["MetricDataResults"]:
+            yield from _metric_samples(result)
+    elif "Values" in record:
+        yield record.get("InstanceId") or record.get("Label"), record["Values"]
+    elif "Datapoints" in record:
+        yield record.get("InstanceId") or record.get("Label"), [d["Average"] for d in record["Datapoints"]]
+    elif "Average" in record:
+        yield record.get("InstanceId"), [record["Average"]]
+
+
+# ============================================================
+# Offline auditor
+# ============================================================
+
+class OfflineAuditor:
+    """
+    Evaluates dumps with the live agents' rules. Each iter_* method is a
+    generator, so results can be written out as they are produced.
+    """
+
+    def __init__(self, cpu_threshold: float = 5.0):
+        self.cpu_threshold = cpu_threshold
+        self.skipped_keys = []
+        self.unknown_keys = []      # no rotation status in the dump
+        self.unknown_buckets = []   # configuration not exported
+
+    def load_cpu_averages(self, path: str) -> dict:
+        """instance_id → mean CPU. Memory is one (sum, count) pair per instance."""
+        totals = {}
+        for record in iter_json_records(path):
+            for instance_id, values in _metric_samples(record):
+                if not instance_id:
+                    continue
+                entry = totals.setdefault(instance_id, [0.0, 0])
+                entry[0] += sum(values)
+                entry[1] += len(values)
+        return {iid: (s / n if n else 0.0) for iid, (s, n) in totals.items()}
+
+    def iter_ec2(self, instances_path: str, metrics_path: str = None):
+        averages = self.load_cpu_averages(metrics_path) if metrics_path else {}
+        for record in iter_json_records(instances_path):
+            for inst in _instances(record):
+                # No datapoints counts as idle, exactly like the live CloudWatch check
+                yield evaluate_instance(inst, averages.get(inst["InstanceId"], 0.0), self.cpu_threshold)
+
+    def iter_s3(self, buckets_path: str):
+        for record in iter_json_records(buckets_path):
+            if any(key not in record for key in S3_CONFIG_KEYS):
+                self.unknown_buckets.append(record["Name"])
+                continue
+            pab = record.get("PublicAccessBlock") or {}
+            yield evaluate_bucket(
+                record["Name"],
+                versioning=versioning_enabled(record.get("Versioning")),
+                encryption=encryption_enabled(record.get("Encryption")),
+                public_access=public_access_open(pab.get("PublicAccessBlockConfiguration", pab) or None)
+            )
+
+    def iter_kms(self, keys_path: str):
+        for record in iter_json_records(keys_path):
+            key_id = record["KeyId"]
+            meta = record.get("KeyMetadata")
+            reason = rotation_skip_reason(meta) if meta else None
+            if reason:
+                self.skipped_keys.append({"key_id": key_id, "reason": reason})
+                continue
+            if record.get("KeyRotationEnabled") is None:
+                self.unknown_keys.append(key_id)
+                continue
+            yield evaluate_key(key_id, rotation_enabled=bool(record["KeyRotationEnabled"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit exported AWS inventory dumps offline")
+    parser.add_argument("--ec2", help="describe_instances dump (JSON/JSONL)")
+    parser.add_argument("--cpu-metrics", help="CloudWatch CPUUtilization export (JSON/JSONL)")
+    parser.add_argument("--s3", help="bucket configuration dump (JSON/JSONL)")
+    parser.add_argument("--kms", help="KMS key listing with metadata + rotation status (JSON/JSONL)")
+    parser.add_argument("--cpu-threshold", type=float, default=5.0)
+    parser.add_argument("--out", help="write NDJSON findings here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if not (args.ec2 or args.s3 or args.kms):
+        parser.error("give at least one of --ec2, --s3, --kms")
+
+    auditor = OfflineAuditor(cpu_threshold=args.cpu_threshold)
+    streams = []
+    if args.ec2:
+        streams.append(("EC2", auditor.iter_ec2(args.ec2, args.cpu_metrics)))
+    if args.s3:
+        streams.append(("S3", auditor.iter_s3(args.s3)))
+    if args.kms:
+        streams.append(("KMS", auditor.iter_kms(args.kms)))
+
+    summary = {}
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        for service, results in streams:
+            counts = summary.setdefault(service, {"resources": 0, "non_compliant": 0})
+            for result in results:
+                counts["resources"] += 1
+                if result.get("actions") or result.get("Action", "Active") != "Active":
+                    counts["non_compliant"] += 1
+                out.write(json.dumps({"service": service, **result}) + "\n")
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if args.out:
+            out.close()
+
+    if auditor.skipped_keys:
+        summary.setdefault("KMS", {})["skipped_out_of_scope"] = len(auditor.skipped_keys)
+    if auditor.unknown_buckets:
+        summary.setdefault("S3", {})["unknown_configuration"] = len(auditor.unknown_buckets)
+        logger.warning(
+            f"⚠️  {len(auditor.unknown_buckets)} bucket(s) lack {'/'.join(S3_CONFIG_KEYS)} in the dump — "
+            f"not evaluated"
+        )
+    if auditor.unknown_keys:
+        summary.setdefault("KMS", {})["unknown_rotation_status"] = len(auditor.unknown_keys)
+        logger.warning(
+            f"⚠️  {len(auditor.unknown_keys)} KMS key(s) have no KeyRotationEnabled in the dump — "
+            f"not evaluated"
+        )
+    logger.info(f"✅ Offline audit complete: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
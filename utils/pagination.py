@@ -0,0 +1,52 @@
+"""
+Cursor pagination + field selection for the READ-ONLY /state endpoints.
+
+Items are ordered by resource ID and the cursor is an opaque token holding
+the last ID returned, so the next page starts at the first ID after it —
+even if that resource was deleted in the meantime. Resources added behind
+the cursor are not returned on later pages.
+"""
+import base64
+import bisect
+import json
+
+
+def encode_cursor(last_id: str) -> str:
+    raw = json.dumps({"after": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate(items: list, cursor: str = None, limit: int = None, key_fn=lambda item: item):
+    """
+    Return (page, next_cursor) for `items`, sorted by `key_fn`, starting
+    after the ID held in `cursor`.
+    """
+    items = sorted(items, key=key_fn)
+    start = 0
+    if cursor:
+        after = decode_cursor(cursor)
+        start = bisect.bisect_right([key_fn(item) for item in items], after)
+
+    end = len(items) if limit is None else min(start + limit, len(items))
+    page = items[start:end]
+    next_cursor = encode_cursor(key_fn(page[-1])) if page and end < len(items) else None
+    return page, next_cursor
+
+
+def parse_fields(fields: str, allowed) -> list:
+    """Parse a comma-separated `fields` parameter. None/empty → all allowed fields."""
+    if not fields:
+        return list(allowed)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return selected
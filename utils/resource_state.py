@@ -0,0 +1,61 @@
+"""
+Read-only, per-resource state lookups.
+Used by the /state endpoints and the drift watcher so that a single
+bucket, key or instance can be re-checked without scanning the account.
+Passing `fields` runs only the requested checks (one API call per field).
+"""
+from utils.aws_helpers import (
+    get_average_cpu_utilization,
+    check_s3_versioning,
+    check_s3_encryption,
+    is_public_access_enabled,
+    check_key_rotation,
+)
+
+S3_FIELDS = {
+    "versioning": check_s3_versioning,
+    "encryption": check_s3_encryption,
+    "public_access": is_public_access_enabled,
+}
+KMS_FIELDS = {
+    "rotation_enabled": check_key_rotation,
+}
+EC2_FIELDS = ("name", "cpu_48h_avg")
+
+
+def s3_bucket_state(bucket: str, fields=None) -> dict:
+    """Return versioning + encryption + public access for one bucket."""
+    state = {"bucket": bucket}
+    for field in fields or S3_FIELDS:
+        state[field] = S3_FIELDS[field](bucket)
+    return state
+
+
+def kms_key_state(key_id: str, fields=None) -> dict:
+    """Return rotation status for one KMS key."""
+    state = {"key_id": key_id}
+    for field in fields or KMS_FIELDS:
+        state[field] = KMS_FIELDS[field](key_id)
+    return state
+
+
+def ec2_instance_state(instance_id: str, name: str, hours: int = 48, fields=None) -> dict:
+    """Return CPU average for one EC2 instance."""
+    fields = fields or EC2_FIELDS
+    state = {"instance_id": instance_id}
+    if "name" in fields:
+        state["name"] = name
+    if "cpu_48h_avg" in fields:
+        state["cpu_48h_avg"] = get_average_cpu_utilization(instance_id, hours=hours)
+    return state
+
+
+def is_compliant(service: str, state: dict, cpu_threshold: float = 5.0) -> bool:
+    """Evaluate a state dict with the same rules the agents remediate on."""
+    if service == "s3":
+        return bool(state["versioning"] and state["encryption"] and not state["public_access"])
+    if service == "kms":
+        return bool(state["rotation_enabled"])
+    if service == "ec2":
+        return state["cpu_48h_avg"] >= cpu_threshold
+    raise ValueError(f"Unknown service: {service}")
@@ -0,0 +1,108 @@
+"""
+Pure compliance rules (no AWS clients, no network).
+
+Shared by the live helpers/agents and the offline dump auditor, so a
+bucket, key or instance is judged identically whether its data came from
+a live API call or from an exported JSON dump.
+"""
+
+
+# ============================================================
+# Response parsing
+# ============================================================
+
+def instance_name(instance: dict) -> str:
+    return next((t["Value"] for t in instance.get("Tags", []) if t["Key"] == "Name"), "Unnamed")
+
+
+def running_instances(reservations: list) -> list:
+    """Flatten describe_instances reservations to running {InstanceId, Name} entries."""
+    instances = []
+    for reservation in reservations:
+        for instance in reservation.get("Instances", []):
+            state = instance.get("State", {}).get("Name", "running")
+            if state == "running":
+                instances.append({"InstanceId": instance["InstanceId"], "Name": instance_name(instance)})
+    return instances
+
+
+def average_cpu(datapoints: list) -> float:
+    """Mean of CloudWatch `Average` datapoints; no data counts as 0% (idle)."""
+    if not datapoints:
+        return 0.0
+    return sum(d["Average"] for d in datapoints) / len(datapoints)
+
+
+def versioning_enabled(resp: dict) -> bool:
+    """get_bucket_versioning response → enabled?"""
+    return (resp or {}).get("Status") == "Enabled"
+
+
+def encryption_enabled(resp) -> bool:
+    """get_bucket_encryption response (None when not configured) → enabled?"""
+    return bool(resp)
+
+
+def public_access_open(config) -> bool:
+    """PublicAccessBlockConfiguration (None when missing) → public access possible?"""
+    if not config:
+        return True  # No configuration = public access allowed
+    # If any flag is False, public access might be open
+    return not all(config.values())
+
+
+def rotation_skip_reason(meta: dict):
+    """Return why rotation is out of scope for this key, or None if it is in scope."""
+    if meta.get("KeyManager") != "CUSTOMER":
+        return "aws_managed"
+    if meta.get("KeyState") != "Enabled":
+        return f"key_state:{meta.get('KeyState')}"
+    spec = meta.get("KeySpec") or meta.get("CustomerMasterKeySpec")
+    if spec and spec != "SYMMETRIC_DEFAULT":
+        return f"key_spec:{spec}"
+    if meta.get("Origin", "AWS_KMS") != "AWS_KMS":
+        return f"origin:{meta.get('Origin')}"
+    return None
+
+
+# ============================================================
+# Per-resource evaluation (same result shapes as the agents)
+# ============================================================
+
+def evaluate_bucket(bucket_name: str, versioning: bool, encryption: bool, public_access: bool) -> dict:
+    bucket_result = {
+        "bucket": bucket_name,
+        "checks": {
+            "versioning": versioning,
+            "encryption": encryption,
+            "public_access": public_access
+        },
+        "actions": []
+    }
+    if not versioning:
+        bucket_result["actions"].append("Enabled versioning")
+    if not encryption:
+        bucket_result["actions"].append("Enabled AES256 encryption")
+    if public_access:
+        bucket_result["actions"].append("Blocked public access")
+    return bucket_result
+
+
+def evaluate_key(key_id: str, rotation_enabled: bool) -> dict:
+    key_result = {
+        "key_id": key_id,
+        "rotation_enabled": rotation_enabled,
+        "actions": []
+    }
+    if not rotation_enabled:
+        key_result["actions"].append("Enabled key rotation")
+    return key_result
+
+
+def evaluate_instance(inst: dict, avg_cpu: float, threshold: float = 5.0) -> dict:
+    return {
+        "InstanceId": inst["InstanceId"],
+        "Name": inst["Name"],
+        "AvgCPU": avg_cpu,
+        "Action": "Terminated (or DRY_RUN)" if avg_cpu < threshold else "Active"
+    }
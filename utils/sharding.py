@@ -0,0 +1,307 @@
+"""
+Distributed scan sharding (coordinator / workers).
+
+The coordinator lists the inventory, splits it into shards and pushes them
+onto a task queue. Workers pull shards, run the SAME per-resource agent
+checks (S3Agent.audit_bucket, KMSAgent.audit_key, EC2Agent.audit_instance)
+and push results back; the coordinator merges them in inventory order.
+
+Queues are pluggable:
+  - LocalTaskQueue: multiprocessing queues, workers are local processes
+  - RedisTaskQueue: any Redis-protocol server; run remote workers with
+        python -m utils.sharding worker --redis redis://host:6379/0
+
+Each worker is a separate process, so each keeps its own AWS clients.
+Remediation of one resource is still serialized across workers and API
+processes by resource_locks' cross-process layer (utils.single_flight).
+"""
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+import uuid
+
+from utils.logger import get_logger
+
+logger = get_logger("Sharding")
+
+
+# ============================================================
+# Evaluators (run inside workers)
+# ============================================================
+
+def _eval_s3(items):
+    from agents.s3_agent import S3Agent
+    agent = S3Agent()
+    return [agent.audit_bucket(bucket) for bucket in items]
+
+
+def _eval_kms(items):
+    from agents.kms_agent import KMSAgent
+    agent = KMSAgent()
+    return [agent.audit_key(key_id) for key_id in items]
+
+
+def _eval_ec2(items):
+    from agents.ec2_agent import EC2Agent
+    agent = EC2Agent()
+    return [agent.audit_instance(inst) for inst in items]
+
+
+def _eval_synthetic(items):
+    """Benchmark stand-in: ~one AWS round trip per resource (I/O bound)."""
+    latency = float(os.getenv("SYNTHETIC_LATENCY_SECONDS", "0.005"))
+    results = []
+    for item in items:
+        time.sleep(latency)
+        results.append({"id": item, "ok": True})
+    return results
+
+
+def _eval_synthetic_cpu(items):
+    """Benchmark stand-in: CPU-bound rule evaluation per resource."""
+    rounds = int(os.getenv("SYNTHETIC_CPU_ROUNDS", "20000"))
+    results = []
+    for item in items:
+        acc = 0
+        for i in range(rounds):
+            acc = (acc * 31 + i) % 1000003
+        results.append({"id": item, "ok": acc >= 0})
+    return results
+
+
+EVALUATORS = {
+    "s3": _eval_s3,
+    "kms": _eval_kms,
+    "ec2": _eval_ec2,
+    "synthetic": _eval_synthetic,
+    "synthetic_cpu": _eval_synthetic_cpu,
+}
+
+
+# ============================================================
+# Task queues
+# ============================================================
+
+class LocalTaskQueue:
+    """multiprocessing-backed queue; workers are spawned by the coordinator."""
+
+    local_workers = True
+
+    def __init__(self, ctx=None):
+        ctx = ctx or mp.get_context("spawn")
+        self.ctx = ctx
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+
+    def put_task(self, task):
+        self.tasks.put(task)
+
+    def get_task(self, timeout=None):
+        try:
+            return self.tasks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put_result(self, result):
+        self.results.put(result)
+
+    def get_result(self, timeout=None):
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RedisTaskQueue:
+    """Redis-protocol queue (LPUSH / BRPOP) shared by coordinators and remote workers."""
+
+    local_workers = False
+
+    def __init__(self, url: str = "redis://localhost:6379/0", name: str = "compliance-shards"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisTaskQueue requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.task_key = f"{name}:tasks"
+        self.name = name
+
+    def _result_key(self, job_id):
+        return f"{self.name}:results:{job_id}"
+
+    def put_task(self, task):
+        self.client.lpush(self.task_key, json.dumps(task))
+
+    def get_task(self, timeout=None):
+        item = self.client.brpop(self.task_key, timeout=int(math.ceil(timeout or 0)))
+        return json.loads(item[1]) if item else None
+
+    def put_result(self, result):
+        key = self._result_key(result["job_id"])
+        self.client.lpush(key, json.dumps(result))
+        self.client.expire(key, 3600)
+
+    def get_result(self, timeout=None, job_id=None):
+        item = self.client.brpop(self._result_key(job_id), timeout=int(math.ceil(timeout or 0)))
+        return json.loads(item[1]) if item else None
+
+
+def get_task_queue():
+    """Redis queue if SHARD_QUEUE_URL is set (remote workers), else local processes."""
+    url = os.getenv("SHARD_QUEUE_URL")
+    return RedisTaskQueue(url) if url else LocalTaskQueue()
+
+
+# ============================================================
+# Worker
+# ============================================================
+
+def worker_loop(task_queue, poll_timeout: float = 1.0):
+    """Pull shards until a stop task arrives."""
+    worker = f"{os.uname().nodename}:{os.getpid()}"
+    logger.info(f"👷 Shard worker {worker} started")
+
+    while True:
+        task = task_queue.get_task(timeout=poll_timeout)
+        if task is None:
+            continue
+        if task.get("stop"):
+            break
+
+        result = {"job_id": task["job_id"], "shard": task["shard"], "worker": worker}
+        try:
+            result["results"] = EVALUATORS[task["service"]](task["items"])
+        except Exception as e:
+            logger.error(f"Shard {task['shard']} of job {task['job_id']} failed: {e}")
+            result["error"] = str(e)
+        task_queue.put_result(result)
+
+    logger.info(f"👷 Shard worker {worker} stopped")
+
+
+def _local_worker(task_queue):
+    worker_loop(task_queue)
+
+
+# ============================================================
+# Coordinator
+# ============================================================
+
+def make_shards(items: list, workers: int, shard_size: int = None) -> list:
+    """Split into ~4 shards per worker (for load balancing) unless shard_size is given."""
+    if not items:
+        return []
+    size = shard_size or max(1, math.ceil(len(items) / (max(1, workers) * 4)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_sharded(service: str, items: list, workers: int = 4, task_queue=None,
+                shard_size: int = None, timeout: float = 3600.0) -> list:
+    """Fan `items` out to workers and return the merged results in input order."""
+    if service not in EVALUATORS:
+        raise ValueError(f"Unknown service: {service}")
+
+    task_queue = task_queue or get_task_queue()
+    job_id = uuid.uuid4().hex
+    shards = make_shards(items, workers, shard_size)
+    if not shards:
+        return []
+    logger.info(f"🧩 Job {job_id}: {len(items)} {service} resource(s) → {len(shards)} shard(s), {workers} worker(s)")
+
+    processes = []
+    if task_queue.local_workers:
+        for _ in range(workers):
+            p = task_queue.ctx.Process(target=_local_worker, args=(task_queue,), daemon=True)
+            p.start()
+            processes.append(p)
+
+    try:
+        for index, shard in enumerate(shards):
+            task_queue.put_task({"job_id": job_id, "shard": index, "service": service, "items": shard})
+
+        merged, errors = {}, []
+        deadline = time.monotonic() + timeout
+        while len(merged) + len(errors) < len(shards):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Job {job_id}: {len(shards) - len(merged)} shard(s) still pending")
+
+            # A local worker that died (OOM, segfault, killed) never reports its shard
+            dead = [p for p in processes if not p.is_alive()]
+            if dead:
+                codes = ", ".join(f"pid {p.pid} exit {p.exitcode}" for p in dead)
+                raise RuntimeError(
+                    f"Job {job_id}: worker process(es) died ({codes}); "
+                    f"{len(shards) - len(merged) - len(errors)} shard(s) unfinished"
+                )
+
+            kwargs = {} if task_queue.local_workers else {"job_id": job_id}
+            result = task_queue.get_result(timeout=min(remaining, 1.0), **kwargs)
+            if result is None or result.get("job_id") != job_id:
+                continue
+            if "error" in result:
+                errors.append(f"shard {result['shard']}: {result['error']}")
+            else:
+                merged[result["shard"]] = result["results"]
+
+        if errors:
+            raise RuntimeError(f"Job {job_id} failed: {'; '.join(errors)}")
+    except BaseException:
+        # Don't wait on survivors: a killed worker may have left a queue lock held
+        for p in processes:
+            p.terminate()
+        raise
+    finally:
+        for _ in processes:
+            task_queue.put_task({"stop": True})
+        for p in processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+
+    return [r for index in range(len(shards)) for r in merged[index]]
+
+
+def audit_sharded(service: str, workers: int = 4, task_queue=None, timeout: float = None) -> dict:
+    """
+    Coordinator entry point for the API: list the inventory here, audit it
+    on workers, and return the same shape as the agent's run().
+    """
+    from utils.aws_helpers import get_all_instances, get_s3_buckets, get_kms_keys
+
+    if timeout is None:
+        timeout = float(os.getenv("SHARD_JOB_TIMEOUT_SECONDS", "300"))
+
+    if service == "s3":
+        return {"result": run_sharded("s3", get_s3_buckets(), workers, task_queue, timeout=timeout)}
+
+    if service == "kms":
+        from utils.kms_index import kms_key_index
+        keys, skipped = kms_key_index.partition(get_kms_keys())
+        return {"result": run_sharded("kms", keys, workers, task_queue, timeout=timeout), "skipped": skipped}
+
+    if service == "ec2":
+        instances = get_all_instances()
+        if not instances:
+            return {"result": {"ec2": "No running instances found."}}
+        return {"result": {"ec2": run_sharded("ec2", instances, workers, task_queue, timeout=timeout)}}
+
+    raise ValueError(f"Unknown service: {service}")
+
+
+# ============================================================
+# Remote worker CLI
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a compliance shard worker")
+    parser.add_argument("mode", choices=["worker"])
+    parser.add_argument("--redis", default=os.getenv("SHARD_QUEUE_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--queue-name", default="compliance-shards")
+    args = parser.parse_args()
+
+    worker_loop(RedisTaskQueue(args.redis, args.queue_name))
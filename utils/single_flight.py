@@ -0,0 +1,222 @@
+"""
+Request coalescing for concurrent audits and state reads.
+
+- SingleFlight: concurrent callers with the same key wait on ONE in-flight
+  computation and share its result (or its exception).
+- ResourceLocks: per-resource locks so concurrent remediation runs touching
+  the same bucket / key / instance are serialized, including across
+  processes (sharded workers) via CrossProcessLocks.
+"""
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.logger import get_logger
+
+logger = get_logger("SingleFlight")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-based single-flight group (FastAPI runs sync endpoints in a
+    thread pool). Results are NOT cached: once the leader finishes, the
+    next call with the same key starts a fresh computation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def _stat(self, key):
+        endpoint = key[0] if isinstance(key, tuple) else str(key)
+        return self._stats.setdefault(endpoint, {"executed": 0, "coalesced": 0, "in_flight": 0})
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stat(key)["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                stat = self._stat(key)
+                stat["executed"] += 1
+                stat["in_flight"] += 1
+                leader = True
+
+        if not leader:
+            logger.info(f"⏳ Coalesced request {key} onto in-flight call")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._stat(key)["in_flight"] -= 1
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {endpoint: dict(s) for endpoint, s in self._stats.items()}
+
+
+LOCK_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "locks")
+
+# Compare-and-delete so a holder never releases a lock that expired and was re-taken
+_REDIS_RELEASE = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CrossProcessLocks:
+    """
+    Per-resource locks visible to other processes. Sharded workers run the
+    agents' remediation in their own processes (or hosts), where the
+    in-process locks of ResourceLocks can't see each other.
+      - SHARD_QUEUE_URL set: Redis SET NX with a TTL (remote workers too)
+      - otherwise: fcntl.flock on one of `stripes` lock files under locks/
+    """
+
+    def __init__(self, lock_dir: str = LOCK_DIR, stripes: int = 256,
+                 redis_url: str = None, ttl: int = 300, poll_interval: float = 0.1):
+        self.lock_dir = lock_dir
+        self.stripes = stripes
+        self.redis_url = redis_url if redis_url is not None else os.getenv("SHARD_QUEUE_URL")
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._client = None
+
+    @staticmethod
+    def _name(key: tuple) -> str:
+        return ":".join(str(part) for part in key)
+
+    @contextmanager
+    def hold(self, key: tuple):
+        """Yields True if the lock had to be waited for."""
+        if self.redis_url:
+            with self._hold_redis(key) as waited:
+                yield waited
+        else:
+            with self._hold_file(key) as waited:
+                yield waited
+
+    @contextmanager
+    def _hold_file(self, key: tuple):
+        # hash() is salted per process, so stripe on a stable digest
+        digest = hashlib.sha256(self._name(key).encode()).digest()
+        stripe = int.from_bytes(digest[:4], "big") % self.stripes
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+        with open(os.path.join(self.lock_dir, f"resource-{stripe:03d}.lock"), "a") as f:
+            waited = False
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                waited = True
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield waited
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _hold_redis(self, key: tuple):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+
+        name = f"compliance-locks:{self._name(key)}"
+        token = uuid.uuid4().hex
+        waited = False
+        while not self._client.set(name, token, nx=True, ex=self.ttl):
+            waited = True
+            time.sleep(self.poll_interval)
+        try:
+            yield waited
+        finally:
+            self._client.eval(_REDIS_RELEASE, 1, name, token)
+
+
+class ResourceLocks:
+    """
+    Lock per resource key, e.g. ("s3", "my-bucket"), created on first use
+    and dropped once its last holder releases it (no growth per resource). The
+    thread lock serializes callers in this process; the cross-process
+    lock then serializes them against other API processes and shard workers.
+    """
+
+    def __init__(self, cross_process: CrossProcessLocks = None):
+        self._lock = threading.Lock()
+        self._locks = {}   # key -> [lock, holders + waiters]; dropped when unused
+        self.contended = 0
+        self.cross_process = cross_process or CrossProcessLocks()
+
+    @contextmanager
+    def hold(self, *key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        lock = entry[0]
+        if not lock.acquire(blocking=False):
+            with self._lock:
+                self.contended += 1
+            logger.info(f"🔒 Waiting for concurrent remediation on {key}")
+            lock.acquire()
+        try:
+            with self.cross_process.hold(key) as waited:
+                if waited:
+                    with self._lock:
+                        self.contended += 1
+                    logger.info(f"🔒 Waited for remediation on {key} in another process")
+                yield
+        finally:
+            lock.release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+def request_key(endpoint: str, **params) -> tuple:
+    """Build a coalescing key from (endpoint, account, region, parameters)."""
+    account = os.getenv("AWS_ACCOUNT_ID") or os.getenv("AWS_PROFILE") or "default"
+    region = os.getenv("AWS_REGION", "ap-south-1")
+    return (endpoint, account, region, tuple(sorted(params.items())))
+
+
+# Process-wide instances shared by the API and the agents
+single_flight = SingleFlight()
+resource_locks = ResourceLocks()
+
+
+def coalescing_stats() -> dict:
+    return {
+        "requests": single_flight.stats(),
+        "remediation_lock_contention": resource_locks.contended
+    }